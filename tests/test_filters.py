@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+import torch
+import voxel as vx
+
+
+def test_gaussian_blur() -> None:
+
+    # blurring a single impulse should reproduce the separable kernel
+    image = torch.zeros(1, 21, 21, 21)
+    image[0, 10, 10, 10] = 1
+    blurred = vx.filters.gaussian_blur(image, (1, 2, 3))
+    kernels = [vx.filters.gaussian_kernel_1d(s) for s in (1, 2, 3)]
+    expected = torch.einsum('i,j,k->ijk', *kernels)
+    r = [(len(k) - 1) // 2 for k in kernels]
+    center = blurred[0, 10 - r[0]:11 + r[0], 10 - r[1]:11 + r[1], 10 - r[2]:11 + r[2]]
+    assert torch.allclose(center, expected, atol=1e-6)
+    assert torch.isclose(blurred.sum(), torch.tensor(1.0), atol=1e-5)
+
+    # multi-channel and batched inputs should be blurred independently per channel
+    image = torch.rand(2, 3, 16, 17, 18)
+    batched = vx.filters.gaussian_blur(image, 1.5, batched=True)
+    single = vx.filters.gaussian_blur(image[1, 2:], 1.5)
+    assert batched.shape == image.shape
+    assert torch.allclose(batched[1, 2:], single, atol=1e-6)
+
+    # numpy scalar sigmas should be accepted like python scalars
+    image = torch.rand(1, 10, 11, 12)
+    expected = vx.filters.gaussian_blur(image, 1.5)
+    assert torch.equal(vx.filters.gaussian_blur(image, np.float32(1.5)), expected)
+    assert torch.allclose(vx.GaussianBlur(np.float32(1.5))(image[None])[0], expected, atol=1e-6)
+
+
+def test_gaussian_blur_fft() -> None:
+
+    # frequency-domain convolution should match the spatial convolution
+    image = torch.rand(2, 24, 25, 26)
+    for padding, stride in (('same', None), ('valid', 2)):
+        spatial = vx.filters.gaussian_blur(image, (1, 2.5, 3), padding=padding, stride=stride, fft=False)
+        frequency = vx.filters.gaussian_blur(image, (1, 2.5, 3), padding=padding, stride=stride, fft=True)
+        assert spatial.shape == frequency.shape
+        assert torch.allclose(spatial, frequency, atol=1e-5)
+
+
+def test_dilate() -> None:
+
+    # each channel of each batch item should be dilated independently
+    image = torch.zeros(2, 3, 9, 9, 9)
+    image[1, 2, 4, 4, 4] = 1
+    dilated = vx.filters.dilate(image, iterations=2, batched=True)
+    assert dilated.shape == image.shape
+    assert dilated[0].sum() == 0 and dilated[1, :2].sum() == 0
+    assert dilated[1, 2, 2, 4, 4] == 1 and dilated[1, 2, 3, 3, 4] == 1
+    assert dilated[1, 2, 3, 3, 3] == 0
+
+
+def test_gaussian_blur_uint8() -> None:
+
+    # fixed-point blurring should be within a rounding step (per axis) of the float result
+    image = (torch.rand(2, 20, 21, 22) * 255).to(torch.uint8)
+    quantized = vx.filters.gaussian_blur_uint8(image, (1, 1.5, 2))
+    reference = vx.filters.gaussian_blur(image, (1, 1.5, 2))
+    assert quantized.dtype == torch.uint8
+    assert (quantized.float() - reference).abs().max() <= 3
+
+
+def test_gaussian_blur_batch() -> None:
+
+    # images of different shapes should be blurred as if blurred individually
+    images = [torch.rand(1, 12, 13, 14), torch.rand(2, 9, 10, 11)]
+    batch = vx.filters.gaussian_blur_batch(images, (1, 1.5, 2))
+    for image, blurred in zip(images, batch):
+        assert torch.equal(blurred, vx.filters.gaussian_blur(image, (1, 1.5, 2)))
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason='requires CUDA')
+def test_gaussian_blur_batch_streams() -> None:
+
+    # blurring on side streams should match blurring on the current stream, including
+    # for kernels that are not cached before the batch is dispatched
+    vx.filters._cached_kernel.cache_clear()
+    vx.filters._cached_weight.cache_clear()
+    vx.filters._cached_dense_weight.cache_clear()
+    images = [torch.rand(1, 32, 33, 34, device='cuda') for _ in range(6)]
+    images += [torch.rand(3, 20, 21, 22, device='cuda', dtype=torch.float64)]
+    batch = vx.filters.gaussian_blur_batch(images, (0.7, 1.3, 2.1))
+    for image, blurred in zip(images, batch):
+        expected = vx.filters.gaussian_blur(image, (0.7, 1.3, 2.1))
+        assert torch.allclose(blurred, expected, atol=1e-6)
+
+
+def test_gaussian_blur_numba() -> None:
+
+    # the numba backend should match the torch backend and keep the input precision
+    pytest.importorskip('numba')
+    for dtype in (torch.float32, torch.float64):
+        image = torch.rand(2, 12, 13, 14, dtype=dtype)
+        blurred = vx.filters.gaussian_blur(image, (1, 1.5, 2), backend='numba')
+        assert blurred.dtype == dtype
+        assert torch.allclose(blurred, vx.filters.gaussian_blur(image, (1, 1.5, 2)), atol=1e-5)
+
+    # strided, unpadded, differentiable, and GPU inputs should fall back to torch
+    image = torch.rand(1, 12, 13, 14)
+    for kwargs in (dict(stride=2), dict(padding='valid')):
+        blurred = vx.filters.gaussian_blur(image, 1.5, backend='numba', **kwargs)
+        assert torch.equal(blurred, vx.filters.gaussian_blur(image, 1.5, **kwargs))
+    blurred = vx.filters.gaussian_blur(image.requires_grad_(), 1.5, backend='numba')
+    assert blurred.requires_grad
+    if torch.cuda.is_available():
+        image = image.detach().cuda()
+        blurred = vx.filters.gaussian_blur(image, 1.5, backend='numba')
+        assert blurred.is_cuda
+        assert torch.equal(blurred, vx.filters.gaussian_blur(image, 1.5))
+
+
+def test_gaussian_blur_compute_dtype() -> None:
+
+    # the convolution runs at the lower precision, but the output keeps the input type
+    image = torch.rand(2, 20, 21, 22, dtype=torch.float64)
+    expected = vx.filters.gaussian_blur(image, [1.5, 2, 1])
+    blurred = vx.filters.gaussian_blur(image, [1.5, 2, 1], compute_dtype=torch.float32)
+    assert blurred.dtype == torch.float64
+    assert torch.allclose(blurred, expected, atol=1e-5)
@@ -1,3 +1,4 @@
+import pytest
 import torch
 import voxel as vx
 
@@ -45,3 +46,127 @@ def test_antialiasing() -> None:
     aa = vol.resample_like(target, antialias=True)
     noaa = vol.resample_like(target, antialias=False)
     assert vx.volumes_equal(aa, noaa)
+
+
+def test_sparse_resampling() -> None:
+
+    # the cached sparse operator should match grid sampling
+    vol = utility.brain_t1w().resample(2)
+    target = vol.geometry.resample(2.5).rotate((10, -5, 20), 'world')
+    expected = vol.resample_like(target)
+    try:
+        vx.Volume.use_sparse_cache = True
+        resampled = vol.resample_like(target)
+    finally:
+        vx.Volume.use_sparse_cache = False
+    assert vx.volumes_equal(resampled, expected, vol_tol=3e-3)
+
+    # the operator should be canonical, without duplicate columns in any row
+    operator = target.sampling_matrix(vol.geometry)
+    assert operator.to_sparse_coo().coalesce()._nnz() == operator.values().numel()
+
+
+def test_integer_downsampling() -> None:
+
+    # strided downsampling by integer factors should match grid interpolation
+    vol = utility.brain_t1w().reshape((120, 144, 120))
+    for spacing, mode in [(vol.geometry.spacing * 2, 'linear'),
+                          (vol.geometry.spacing * 3, 'nearest'),
+                          (vol.geometry.spacing * torch.tensor([1, 2, 3]), 'linear')]:
+        resampled = vol.resample(spacing, mode=mode)
+        target = vol.geometry.resample(spacing)
+        expected = vol.resample_like(target, mode=mode)
+        assert vx.volumes_equal(resampled, expected, vol_tol=1e-2)
+
+    # resampling to the current spacing should not change the underlying data
+    assert vol.resample(vol.geometry.spacing).tensor is vol.tensor
+
+
+def test_nearest_resampling() -> None:
+
+    # gathering the nearest voxels directly should match nearest grid sampling
+    vol = vx.Volume(torch.randint(0, 255, (2, 20, 22, 24), dtype=torch.uint8))
+    target = vol.geometry.rotate((10, -15, 20), 'world').shift((3, -2, 1), 'voxel')
+    grid = vx.volume.volume_grid(target.baseshape, vol.geometry.voxel_transform(target),
+                                 vol.baseshape)
+    for padding_mode in ('zeros', 'border'):
+        resampled = vol.resample_like(target, mode='nearest', padding_mode=padding_mode)
+        expected = torch.nn.functional.grid_sample(vol.tensor[None].float(), grid[None],
+                                                   mode='nearest', padding_mode=padding_mode,
+                                                   align_corners=True)[0]
+        assert resampled.dtype == torch.uint8
+
+        # allow for rare rounding differences at coordinates halfway between voxels
+        mismatch = (resampled.tensor.float() != expected).float().mean()
+        assert mismatch < 1e-3
+
+
+def test_resample_like_batch() -> None:
+
+    # volumes with different channel counts that share a geometry are resampled
+    # together, which should match resampling each volume individually
+    vol = utility.brain_t1w().resample(2).float()
+    vols = [vol, vol.new(torch.rand(3, *vol.baseshape)), vol.new(torch.rand(2, *vol.baseshape))]
+    target = vol.geometry.rotate((5, 10, -15), 'world')
+    batched = vx.resample_like_batch(vols, target)
+    for v, resampled in zip(vols, batched):
+        assert resampled.num_channels == v.num_channels
+        assert vx.volumes_equal(resampled, v.resample_like(target))
+
+    # on the same grid, each volume should be returned without a copy
+    batched = vx.resample_like_batch(vols, vol)
+    for v, resampled in zip(vols, batched):
+        assert resampled.tensor.data_ptr() == v.tensor.data_ptr()
+
+
+def test_resample_buffer_reuse() -> None:
+
+    # resampling through the reused float buffer should match the default path,
+    # and the buffer should only be allocated on the first call
+    vol = vx.Volume(torch.randint(0, 255, (2, 20, 21, 22), dtype=torch.uint8))
+    target = vol.geometry.rotate((5, 0, 10), 'world')
+    expected = vol.resample_like(target)
+    try:
+        vx.Volume.reuse_resample_buffers = True
+        first = vol.resample_like(target)
+        scratch = vol._resample_scratch
+        second = vol.resample_like(target)
+        assert vol._resample_scratch is scratch
+    finally:
+        vx.Volume.reuse_resample_buffers = False
+    assert torch.equal(first.tensor, expected.tensor)
+    assert torch.equal(second.tensor, expected.tensor)
+
+
+def test_numba_resampling() -> None:
+
+    # the numba sampler should match grid sampling, including the zero padding of
+    # target voxels that fall outside the source grid
+    pytest.importorskip('numba')
+    vol = vx.Volume(torch.rand(2, 20, 21, 22))
+    target = vol.geometry.rotate((10, -5, 15), 'world').shift((4, -3, 2), 'voxel')
+    matrix = vx.affine.compose_affine(translation=(3, -2, 1), rotation=(10, -5, 15))
+    for mode in ('linear', 'nearest'):
+        expected = vol.resample_like(target, mode=mode)
+        resampled = vol.resample_like(target, mode=mode, backend='numba')
+        assert torch.allclose(resampled.tensor.float(), expected.tensor.float(), atol=1e-4)
+
+        expected = vol.transform(matrix, resample=True, mode=mode)
+        transformed = vol.transform(matrix, resample=True, mode=mode, backend='numba')
+        if mode == 'linear':
+            assert torch.allclose(transformed.tensor, expected.tensor, atol=1e-4)
+        else:
+            # allow for rare rounding differences at coordinates halfway between voxels
+            mismatch = (transformed.tensor != expected.tensor).float().mean()
+            assert mismatch < 1e-3
+
+
+def test_identity_transform() -> None:
+
+    # an identity transform should return the input features as float, on the same grid
+    vol = vx.Volume(torch.randint(0, 255, (2, 20, 21, 22), dtype=torch.uint8))
+    transformed = vol.transform(vx.AffineMatrix(torch.eye(4)), resample=True)
+    assert transformed.dtype == torch.float32
+    assert torch.equal(transformed.tensor, vol.tensor.float())
+    assert transformed.baseshape == vol.baseshape
+    assert torch.allclose(transformed.geometry.tensor, vol.geometry.tensor, atol=1e-6)
@@ -0,0 +1,183 @@
+import pytest
+import torch
+import voxel as vx
+
+
+def test_nonzero_bounds() -> None:
+
+    # nonzero voxels in different channels of a multi-channel volume
+    tensor = torch.zeros(3, 10, 11, 12)
+    tensor[0, 2, 3, 4] = 1
+    tensor[2, 7, 5, 9] = 1
+    vol = vx.Volume(tensor)
+
+    # the nonzero extent should span the voxels in all channels
+    bounds = vol.bounds(nonzero=True)
+    voxels = vol.geometry.inverse().transform(bounds.vertices)
+    assert torch.allclose(voxels.amin(0), torch.tensor([2., 3., 4.]), atol=1e-4)
+    assert torch.allclose(voxels.amax(0), torch.tensor([7., 5., 9.]), atol=1e-4)
+
+    # cropping should only crop the spatial extent, and never the channels
+    cropped = vol.crop_to_nonzero()
+    assert cropped.shape == (3, 6, 3, 6)
+    assert cropped.sum() == 2
+
+
+def test_bounds_margin() -> None:
+
+    # anisotropic voxel spacing of (1, 2, 4)
+    matrix = torch.diag(torch.tensor([1., 2., 4., 1.]))
+    vol = vx.Volume(torch.rand(1, 10, 11, 12), vx.AcquisitionGeometry((10, 11, 12), matrix))
+
+    # a world-space margin should be converted to voxel units along each axis
+    bounds = vol.bounds(margin=4, space='world')
+    voxels = vol.geometry.inverse().transform(bounds.vertices)
+    assert torch.allclose(voxels.amin(0), torch.tensor([-4., -2., -1.]), atol=1e-4)
+    assert torch.allclose(voxels.amax(0), torch.tensor([13., 12., 12.]), atol=1e-4)
+
+    # a voxel-space margin should be applied equally to each axis
+    bounds = vol.bounds(margin=2, space='voxel')
+    voxels = vol.geometry.inverse().transform(bounds.vertices)
+    assert torch.allclose(voxels.amin(0), torch.tensor([-2., -2., -2.]), atol=1e-4)
+    assert torch.allclose(voxels.amax(0), torch.tensor([11., 12., 13.]), atol=1e-4)
+
+
+def test_setitem() -> None:
+
+    tensor = torch.rand(2, 8, 9, 10)
+
+    # scalar assignment through a (broadcast) boolean mask volume
+    vol = vx.Volume(tensor.clone())
+    mask = tensor[:1] > 0.5
+    vol[vx.Volume(mask)] = 0
+    expected = tensor.clone()
+    expected[mask.expand_as(tensor)] = 0
+    assert torch.equal(vol.tensor, expected)
+
+    # scalar assignment to the entire volume
+    vol[...] = 3
+    assert (vol.tensor == 3).all()
+
+    # non-scalar values should still be assigned through regular indexing
+    vol = vx.Volume(tensor.clone())
+    mask = tensor > 0.5
+    values = torch.arange(int(mask.sum()), dtype=torch.float32)
+    vol[vx.Volume(mask)] = values
+    expected = tensor.clone()
+    expected[mask] = values
+    assert torch.equal(vol.tensor, expected)
+
+
+def test_setitem_broadcast() -> None:
+
+    tensor = torch.rand(3, 8, 9, 10)
+
+    # a single-channel mask should fill the masked voxels of every channel
+    vol = vx.Volume(tensor.clone())
+    mask = tensor[:1] > 0.5
+    vol[vx.Volume(mask)] = -1
+    assert (vol.tensor[:, mask[0]] == -1).all()
+    assert torch.equal(vol.tensor[:, ~mask[0]], tensor[:, ~mask[0]])
+
+
+def test_storage_dtype() -> None:
+
+    # new volumes should use the default storage type
+    try:
+        vx.set_default_storage_dtype(torch.bfloat16)
+        vol = vx.AcquisitionGeometry((61, 62, 63)).ones_like()
+    finally:
+        vx.set_default_storage_dtype(None)
+    assert vol.dtype == torch.bfloat16
+
+    # reductions should be accumulated in float32, since the voxel count
+    # is not representable in bfloat16
+    assert vol.sum().dtype == torch.float32
+    assert vol.sum() == 61 * 62 * 63
+    assert vol.mean() == 1
+
+    # integer storage types are not supported by the random constructors
+    with pytest.raises(ValueError):
+        vx.set_default_storage_dtype(torch.int32)
+
+
+def test_quantile() -> None:
+
+    vol = vx.Volume(torch.rand(1, 10, 11, 12))
+    ordered = vol.tensor.flatten().sort().values
+    n = ordered.numel()
+    assert vol.quantile(0.2) == ordered[int(n * 0.2)]
+    assert vol.quantile(0.9) == ordered[n - 1 - int(n * (1 - 0.9))]
+
+
+def test_isin() -> None:
+
+    labels = torch.randint(0, 100, (1, 12, 13, 14))
+    vol = vx.Volume(labels)
+
+    # the binary search lookup for large sets should match the default
+    elements = torch.arange(0, 100, 2)
+    assert torch.equal(vol.isin(elements).tensor, torch.isin(labels, elements))
+
+    # small python sequences should be accepted as well
+    assert torch.equal(vol.isin([3, 7]).tensor, (labels == 3) | (labels == 7))
+
+
+def test_onehot() -> None:
+
+    labels = torch.randint(0, 10, (1, 12, 13, 14))
+    onehot = vx.Volume(labels).onehot([3, 7, 5])
+
+    # one-hot channels should match individual comparisons
+    assert onehot.shape == (3, 12, 13, 14)
+    assert torch.equal(onehot.tensor[1], labels[0] == 7)
+    assert torch.equal(onehot.tensor[2], labels[0] == 5)
+
+
+def test_stack() -> None:
+
+    # channels of different data types should be promoted like torch.cat
+    a = vx.Volume(torch.randint(0, 255, (1, 8, 9, 10), dtype=torch.uint8))
+    b = a.new(torch.rand(2, 8, 9, 10))
+    stacked = vx.stack(a, b)
+    assert stacked.dtype == torch.float32
+    assert torch.equal(stacked.tensor, torch.cat([a.tensor, b.tensor]))
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason='requires cuda')
+def test_stack_devices() -> None:
+
+    # volumes are never implicitly moved across devices
+    a = vx.Volume(torch.rand(1, 8, 9, 10))
+    with pytest.raises(ValueError):
+        vx.stack(a, a.to('cuda'))
+
+
+def test_to() -> None:
+
+    vol = vx.Volume(torch.rand(2, 8, 9, 10))
+
+    # a data type conversion should keep the geometry
+    converted = vol.to(dtype=torch.float64)
+    assert converted.dtype == torch.float64
+    assert torch.equal(converted.tensor, vol.tensor.double())
+    assert converted.geometry is vol.geometry
+
+    # a conversion that changes nothing should return the same volume and tensor
+    assert vol.to() is vol
+    assert vol.to('cpu', torch.float32).tensor is vol.tensor
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason='requires cuda')
+def test_pin_memory() -> None:
+
+    vol = vx.Volume(torch.rand(2, 8, 9, 10))
+    pinned = vol.pin_memory()
+    assert pinned.tensor.is_pinned()
+    assert torch.equal(pinned.tensor, vol.tensor)
+    assert pinned.pin_memory() is pinned
+
+    # transfers from pinned memory can be asynchronous
+    moved = pinned.to('cuda', non_blocking=True)
+    assert moved.device.type == 'cuda'
+    assert torch.equal(moved.tensor.cpu(), vol.tensor)
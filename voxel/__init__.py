@@ -1,8 +1,10 @@
 __version__ = '0.0.1'
 
 from . import caching
+from . import compilation
 from . import slicing
 from . import filters
+from .filters import GaussianBlur
 
 from . import space
 from .space import Space
@@ -20,6 +22,8 @@ from .acquisition import cast_acquisition_geometry
 from . import volume
 from .volume import Volume
 from .volume import volumes_equal
+from .volume import resample_like_batch
+from .volume import set_default_storage_dtype
 
 from . import mesh
 from .mesh import Mesh
@@ -4,10 +4,16 @@ Mapping of image voxel coordinates to world space.
 
 from __future__ import annotations
 
+import collections
 import torch
+import weakref
 import voxel as vx
 
 
+# number of sparse resampling operators cached on each target geometry
+_sampling_matrix_cache_size = 4
+
+
 class AcquisitionGeometry(vx.AffineMatrix):
     """
     Geometry representating the linear relationship between volumetric
@@ -72,6 +78,48 @@ class AcquisitionGeometry(vx.AffineMatrix):
         return AcquisitionGeometry(baseshape, self.tensor,
                                    slice_direction=self._explicit_slice_direction)
 
+    def inverse(self) -> vx.AffineMatrix:
+        """
+        Invert the matrix. Since the geometry is read-only, the inverse is
+        only computed once, unless the matrix requires gradients.
+
+        Returns:
+            AffineMatrix: Inverted affine matrix.
+        """
+        if self.tensor.requires_grad:
+            return vx.AffineMatrix(self.tensor.inverse())
+        # the returned matrix can be modified in-place, so it must not share the cache
+        return vx.AffineMatrix(self._inverse_tensor.clone())
+
+    @vx.caching.cached
+    def _inverse_tensor(self) -> torch.Tensor:
+        """
+        Cached inverse of the matrix tensor.
+        """
+        return self.tensor.inverse()
+
+    def voxel_transform(self, target: AcquisitionGeometry) -> vx.AffineMatrix:
+        """
+        Transform that maps voxel coordinates of a target geometry to voxel coordinates
+        of this geometry, equivalent to `self.inverse() @ target`. Since geometries are
+        read-only, the result is cached for as long as the target geometry exists, and
+        the returned matrix is shared across calls and must not be modified in-place.
+
+        Args:
+            target (AcquisitionGeometry): Target acquisition geometry.
+
+        Returns:
+            AffineMatrix: Target-to-source voxel transform.
+        """
+        if self.tensor.requires_grad or target.tensor.requires_grad:
+            return self.inverse() @ target
+        cache = self._property_cache.setdefault('voxel_transforms', weakref.WeakKeyDictionary())
+        transform = cache.get(target)
+        if transform is None:
+            transform = self.inverse() @ target
+            cache[target] = transform
+        return transform
+
     def numel(self) -> int:
         """
         Number of baseshape elements in the acquisition volume.
@@ -467,11 +515,52 @@ class AcquisitionGeometry(vx.AffineMatrix):
         Returns:
             AffineMatrix: Transformed local coordinates.
         """
-        mat = torch.eye(4)
-        mat[:3, :3] *= 2 / (torch.tensor(self.baseshape) - 1)
-        mat[:3, -1] = -1
-        mat[[0, 2]] = mat[[2, 0]]
-        return vx.AffineMatrix(mat)
+        # the matrix is shared with the sampling grids built by `volume_grid`
+        local = vx.volume._local_matrix(tuple(int(s) for s in self.baseshape))
+        return vx.AffineMatrix(local.clone())
+
+    def sampling_matrix(self,
+        source: vx.Volume | AcquisitionGeometry,
+        mode: str = 'linear',
+        device: torch.device | None = None) -> torch.Tensor:
+        """
+        Sparse operator that resamples features on the grid of a source geometry
+        to this geometry, with zero padding outside the source grid. Each row holds
+        the interpolation weights of a target voxel, so a $(C, W, H, D)$ source volume
+        is resampled by `(M @ tensor.flatten(1).T).T`. The few most recently used
+        operators are cached on this geometry, keyed by the source geometry object,
+        mode, and device.
+
+        Args:
+            source (Volume | AcquisitionGeometry): Source acquisition geometry.
+            mode (str, optional): Interpolation mode, either 'linear' or 'nearest'.
+            device (device, optional): Device to build the operator on. Defaults to
+                the device of this geometry.
+
+        Returns:
+            Tensor: Sparse CSR tensor of shape $(N_{target}, N_{source})$.
+        """
+        if mode not in ('linear', 'nearest'):
+            raise ValueError(f"sampling matrix mode must be 'linear' or 'nearest', but got '{mode}'")
+        source = cast_acquisition_geometry(source)
+
+        device = self.device if device is None else torch.device(device)
+        cache = self._property_cache.setdefault('sampling_matrices', collections.OrderedDict())
+
+        # geometries are read-only, so the source is identified by its object. a weak
+        # reference guards against a new object reusing the id of a collected source
+        key = (id(source), mode, device)
+        entry = cache.get(key)
+        if entry is not None and entry[0]() is source:
+            cache.move_to_end(key)
+            return entry[1]
+
+        operator = _sampling_matrix(self, source, mode, device)
+        cache[key] = (weakref.ref(source), operator)
+        cache.move_to_end(key)
+        while len(cache) > _sampling_matrix_cache_size:
+            cache.popitem(last=False)
+        return operator
 
     def zeros_like(self,
         channels: int = 1,
@@ -487,7 +576,7 @@ class AcquisitionGeometry(vx.AffineMatrix):
             Volume: A new volume instance filled with zeros.
         """
         shape = (channels, *self.baseshape)
-        return vx.Volume(torch.zeros(shape, dtype=dtype, device=self.device), self)
+        return vx.Volume(torch.zeros(shape, dtype=_storage_dtype(dtype), device=self.device), self)
 
     def ones_like(self,
         channels: int = 1,
@@ -503,7 +592,7 @@ class AcquisitionGeometry(vx.AffineMatrix):
             Volume: A new volume instance filled with ones.
         """
         shape = (channels, *self.baseshape)
-        return vx.Volume(torch.ones(shape, dtype=dtype, device=self.device), self)
+        return vx.Volume(torch.ones(shape, dtype=_storage_dtype(dtype), device=self.device), self)
 
     def full_like(self,
         fill: float,
@@ -521,7 +610,7 @@ class AcquisitionGeometry(vx.AffineMatrix):
             Volume: A new filled volume instance.
         """
         shape = (channels, *self.baseshape)
-        return vx.Volume(torch.full(shape, fill, dtype=dtype, device=self.device), self)
+        return vx.Volume(torch.full(shape, fill, dtype=_storage_dtype(dtype), device=self.device), self)
 
     def rand_like(self,
         channels: int = 1,
@@ -538,7 +627,7 @@ class AcquisitionGeometry(vx.AffineMatrix):
             Volume: A new random volume instance.
         """
         shape = (channels, *self.baseshape)
-        return vx.Volume(torch.rand(shape, dtype=dtype, device=self.device), self)
+        return vx.Volume(torch.rand(shape, dtype=_storage_dtype(dtype), device=self.device), self)
 
     def randn_like(self,
         channels: int = 1,
@@ -555,7 +644,14 @@ class AcquisitionGeometry(vx.AffineMatrix):
             Volume: A new random volume instance.
         """
         shape = (channels, *self.baseshape)
-        return vx.Volume(torch.randn(shape, dtype=dtype, device=self.device), self)
+        return vx.Volume(torch.randn(shape, dtype=_storage_dtype(dtype), device=self.device), self)
+
+
+def _storage_dtype(dtype: torch.dtype | None) -> torch.dtype | None:
+    """
+    Data type of a new volume, where None resolves to the default storage type.
+    """
+    return vx.volume.get_default_storage_dtype() if dtype is None else dtype
 
 
 def cast_acquisition_geometry(obj: vx.Volume | AcquisitionGeometry) -> AcquisitionGeometry:
@@ -576,6 +672,51 @@ def cast_acquisition_geometry(obj: vx.Volume | AcquisitionGeometry) -> Acquisiti
         raise ValueError(f'cannot cast {type(obj)} to AcquisitionGeometry')
 
 
+def _sampling_matrix(
+    target: AcquisitionGeometry,
+    source: AcquisitionGeometry,
+    mode: str,
+    device: torch.device) -> torch.Tensor:
+    """
+    Build the sparse CSR resampling operator from a source to a target geometry.
+    Each row stores the (up to eight for linear, or one for nearest) corners that
+    lie inside the source grid, with unique column indices in ascending order.
+    """
+    transform = source.voxel_transform(target).tensor.detach().to(device)
+    points = vx.volume.volume_grid(target.baseshape, vx.AffineMatrix(transform), device=device)
+    points = points.view(-1, 3)
+    n = points.shape[0]
+
+    if mode == 'nearest':
+        # round half to even, which matches the nearest mode of grid_sample
+        corners = points.round()[None]
+        weights = torch.ones(corners.shape[:2], device=device)
+    else:
+        lower = points.floor()
+        frac = points - lower
+        offsets = torch.tensor([[a, b, c] for a in (0, 1) for b in (0, 1) for c in (0, 1)],
+                               dtype=torch.float32, device=device)
+        corners = lower + offsets[:, None]
+        weights = torch.where(offsets[:, None] > 0, frac, 1 - frac).prod(-1)
+        del lower, frac
+    del points
+
+    # flatten the column indices. in the (target voxel, corner) order, the corners of a
+    # row are ordered lexicographically, so their column indices are already ascending
+    W, H, D = source.baseshape
+    shape = torch.tensor(source.baseshape, dtype=torch.float32, device=device)
+    valid = ((corners >= 0) & (corners < shape)).all(-1).T
+    corners = corners.long()
+    cols = corners[..., 0].mul(H).add_(corners[..., 1]).mul_(D).add_(corners[..., 2]).T
+    del corners
+
+    # drop the corners outside the source grid, so each row holds only its valid entries
+    crow = torch.zeros(n + 1, dtype=torch.long, device=device)
+    torch.cumsum(valid.sum(1), 0, out=crow[1:])
+    return torch.sparse_csr_tensor(crow, cols[valid], weights.T[valid],
+                                   size=(n, source.numel()))
+
+
 class Orientation:
     """
     The anatomical orientation of the voxel coordinate system.
@@ -0,0 +1,38 @@
+"""
+Optional graph compilation of performance-critical tensor routines.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import torch
+
+
+def compile_enabled() -> bool:
+    """
+    Whether routines decorated with `optional_compile` are compiled. Compilation
+    is opt-in and enabled by setting the `VOXEL_COMPILE=1` environment variable
+    before importing voxel. It requires `torch.compile` (PyTorch 2.0 or newer).
+    """
+    enabled = os.environ.get('VOXEL_COMPILE', '0').lower() not in ('', '0', 'false')
+    return enabled and hasattr(torch, 'compile')
+
+
+def optional_compile(func: callable = None, **options) -> callable:
+    """
+    Decorator that wraps a function with `torch.compile` if compilation is
+    enabled, otherwise the function is returned unchanged.
+
+    Args:
+        func (callable): The function to compile.
+        **options: Additional arguments passed to `torch.compile`.
+
+    Returns:
+        callable: The (possibly) compiled function.
+    """
+    if func is None:
+        return functools.partial(optional_compile, **options)
+    if not compile_enabled():
+        return func
+    return torch.compile(func, **options)
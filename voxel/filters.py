@@ -4,7 +4,10 @@ Utilies for image grid filtering and kernel construction.
 
 from __future__ import annotations
 
+import functools
+import numbers
 import torch
+import voxel as vx
 
 
 def gaussian_kernel_1d(
@@ -20,16 +23,49 @@ def gaussian_kernel_1d(
         truncate (float, optional): The number of standard deviations to extend
             the kernel before truncating.
         device (torch.device, optional): The device on which to create the kernel.
-        device (torch.dtype, optional): The kernel datatype.
+        dtype (torch.dtype, optional): The kernel datatype.
 
     Returns:
         Tensor: A kernel of shape $2 * truncate * sigma + 1$.
     """
     r = int(truncate * sigma + 0.5)
-    x = torch.arange(-r, r + 1, device=device, dtype=dtype)
-    sigma2 = 1 / torch.clip(torch.as_tensor(sigma), min=1e-5).pow(2)
-    pdf = torch.exp(-0.5 * (x.pow(2) * sigma2))
-    return pdf / pdf.sum()
+
+    # small kernels are cheaper to build on the host and copy to the device in
+    # a single transfer than to build with a handful of tiny device launches
+    build_device = 'cpu' if r < 128 else device
+    x = torch.arange(-r, r + 1, device=build_device, dtype=torch.float64)
+    sigma2 = 1 / max(float(sigma), 1e-5) ** 2
+
+    # softmax fuses the exponential and normalization into a single stable pass
+    kernel = torch.softmax(-0.5 * x.pow(2) * sigma2, dim=0)
+    dtype = torch.get_default_dtype() if dtype is None else dtype
+    return kernel.to(device=device, dtype=dtype, non_blocking=True)
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_kernel(
+    sigma: float,
+    truncate: float,
+    device: torch.device,
+    dtype: torch.dtype) -> torch.Tensor:
+    """
+    Cached variant of `gaussian_kernel_1d` keyed by hashable scalar parameters.
+    The returned tensor is shared across calls and must not be modified in-place.
+    """
+    return gaussian_kernel_1d(sigma, truncate, device, dtype).contiguous()
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_weight(
+    sigma: float,
+    truncate: float,
+    device: torch.device,
+    dtype: torch.dtype) -> torch.Tensor:
+    """
+    Cached Gaussian kernel pre-shaped as a $(1, 1, K, 1)$ convolution weight, as
+    expected by `_apply_kernels`.
+    """
+    return _cached_kernel(sigma, truncate, device, dtype).view(1, 1, -1, 1)
 
 
 def gaussian_blur(
@@ -38,7 +74,10 @@ def gaussian_blur(
     batched: bool = False,
     truncate: float = 2,
     stride: int | tuple[int] | None = None,
-    padding: str = 'same') -> torch.Tensor:
+    padding: str = 'same',
+    fft: bool | None = None,
+    backend: str = 'torch',
+    compute_dtype: torch.dtype | str | None = None) -> torch.Tensor:
     """
     Apply Gaussian blurring to a data grid.
 
@@ -54,68 +93,574 @@ def gaussian_blur(
             the kernel before truncating.
         stride (int | tuple[int] | None, optional): The stride of the convolution.
         padding (str, optional): Padding mode for the convolution. Default is 'same'.
+        fft (bool, optional): If True, convolve in the frequency domain, which is
+            faster for large sigmas since the cost does not depend on the kernel length.
+            If None, the FFT is only used for kernels longer than 64 elements.
+        backend (str, optional): Convolution backend, either 'torch' or 'numba'. The
+            numba backend avoids per-operation dispatch overhead for small CPU grids
+            and requires the numba package. Inputs it does not support (large, strided,
+            unpadded, or GPU grids) use the torch backend.
+        compute_dtype (torch.dtype | str, optional): Datatype in which to run the
+            convolution, after which the result is cast back. Lower precision halves
+            the memory traffic of the convolution at a small cost in accuracy. If 'auto',
+            bfloat16 is used on GPUs with native support (compute capability 8.0+).
 
     Returns:
-        Tensor: The blurred tensor with the same shape as the input tensor.
+        Tensor: The blurred tensor with the same shape as the input tensor. Floating
+            point inputs retain their datatype, while other inputs are promoted to float.
     """
     ndim = image.ndim - (2 if batched else 1)
 
+    if backend not in ('torch', 'numba'):
+        raise ValueError(f"backend must be 'torch' or 'numba', but got '{backend}'")
+
     # sanity check for common mistake
     if ndim == 4 and not batched:
         raise ValueError(f'gaussian blur input has {image.ndim} dims, '
                           'but batched option is False')
 
-    # make sure sigmas match the ndim
-    sigma = torch.as_tensor(sigma)
-    if sigma.ndim == 0:
-        sigma = sigma.repeat(ndim)
-    if len(sigma) != ndim:
-        raise ValueError(f'sigma must be {ndim}D, but got length {len(sigma)}')
-
-    # make sure strides match the ndim
+    # make sure sigmas and strides match the ndim
+    sigma = [float(s) for s in _conform_to_ndim(sigma, ndim, 'sigma')]
     if stride is not None:
-        stride = torch.as_tensor(stride)
-        if stride.ndim == 0:
-            stride = stride.repeat(ndim)
-        if len(stride) != ndim:
-            raise ValueError(f'stride must be {ndim}D, but got length {len(stride)}')
+        stride = [int(s) for s in _conform_to_ndim(stride, ndim, 'stride')]
 
-    blurred = image.float()
+    # only integer (and boolean) inputs need to be promoted for the convolution
+    blurred = image if image.is_floating_point() else image.float()
     if not batched:
         blurred = blurred.unsqueeze(0)
+    output_dtype = blurred.dtype
 
-    for dim, s in enumerate(sigma):
+    compute_dtype = _resolve_compute_dtype(compute_dtype, blurred)
+    if compute_dtype is not None and compute_dtype != output_dtype:
+        blurred = blurred.to(compute_dtype)
+
+    # axes with a zero kernel radius are left untouched, so skip the convolution
+    # entirely when no axis needs to be blurred or subsampled
+    truncate = float(truncate)
+    radii = [int(truncate * s + 0.5) for s in sigma]
+    if not any(radii) and (stride is None or all(s == 1 for s in stride)):
+        return image.clone() if image.is_floating_point() else image.float()
+
+    kernels = _blur_kernels(sigma, truncate, blurred.device, blurred.dtype)
+
+    if backend == 'numba' and _use_numba(blurred, stride, padding):
+        blurred = _numba_blur(blurred, kernels)
+    else:
+        blurred = _apply_kernels(blurred, kernels, stride, padding, fft)
+
+    blurred = blurred.to(output_dtype)
+    if not batched:
+        blurred = blurred.squeeze(0)
+
+    # preserve a channels-last input layout for any downstream convolutions
+    memory_format = {4: torch.channels_last, 5: torch.channels_last_3d}.get(image.ndim)
+    if batched and memory_format is not None and not image.is_contiguous() \
+       and image.is_contiguous(memory_format=memory_format):
+        blurred = blurred.contiguous(memory_format=memory_format)
+
+    return blurred
+
+
+def _blur_kernels(
+    sigma: list,
+    truncate: float,
+    device: torch.device,
+    dtype: torch.dtype) -> list:
+    """
+    Cached per-axis convolution weights of a blur.
+    """
+    # zero-radius axes all share a single identity kernel so that their
+    # (length-one) kernels are never built or cached separately
+    return [_cached_weight(s, truncate, device, dtype) if int(truncate * s + 0.5) else
+            _cached_weight(0.0, 0.0, device, dtype) for s in sigma]
+
+
+def _resolve_compute_dtype(
+    compute_dtype: torch.dtype | str | None,
+    blurred: torch.Tensor) -> torch.dtype | None:
+    """
+    Resolve the datatype in which a blur is computed, where None indicates the
+    datatype of the (floating point) input.
+    """
+    if compute_dtype is None or isinstance(compute_dtype, torch.dtype):
+        return compute_dtype
+    if compute_dtype != 'auto':
+        raise ValueError(f"compute_dtype must be a torch dtype or 'auto', but got '{compute_dtype}'")
+
+    # bfloat16 convolutions are only faster with native hardware support, which on
+    # the CPU is not reliably detectable, so full precision is kept there
+    if blurred.is_cuda and torch.cuda.get_device_capability(blurred.device)[0] >= 8:
+        return torch.bfloat16
+    return None
+
+
+# maximum number of grid elements blurred with the numba backend
+_numba_max_numel = 2 ** 20
+
+
+def _use_numba(blurred: torch.Tensor, stride: list | None, padding: str) -> bool:
+    """
+    Whether a batched grid can be blurred with the numba backend.
+    """
+    return not blurred.is_cuda and not blurred.requires_grad \
+        and blurred.dtype in (torch.float32, torch.float64) \
+        and blurred.numel() <= _numba_max_numel \
+        and padding == 'same' and (stride is None or all(s == 1 for s in stride))
+
+
+def _numba_blur(blurred: torch.Tensor, kernels: list) -> torch.Tensor:
+    """
+    Blur a batched CPU grid with the numba-compiled separable convolution.
+    """
+    try:
+        from voxel import numba_kernels
+    except ImportError as exc:
+        raise ImportError('the numba blur backend requires that the '
+                          'numba package is installed') from exc
+    kernels = [k.view(-1).numpy() for k in kernels]
+    return torch.from_numpy(numba_kernels.blur(blurred.numpy(), kernels))
+
+
+def gaussian_blur_batch(images: list, sigma: list, **kwargs) -> list:
+    """
+    Apply Gaussian blurring to a list of independent data grids, which may
+    differ in shape.
+
+    On the GPU, each image is blurred on a stream from a small pool, so the
+    sequential per-axis convolutions of different images can overlap. The
+    results are synchronized with the current stream before returning.
+
+    Args:
+        images (list of Tensor): Image tensors with preceding channel dimensions.
+        sigma (float): Standard deviations in element (voxel) space.
+        **kwargs: Additional arguments passed to `gaussian_blur`.
+
+    Returns:
+        list of Tensor: The blurred tensors.
+    """
+    if not all(image.is_cuda for image in images):
+        return [gaussian_blur(image, sigma, **kwargs) for image in images]
+
+    # the cached kernels are shared by all streams, so any missing cache entries are
+    # built on the current stream before the side streams are dispatched. otherwise, an
+    # entry built on one side stream could be read by another before it's written
+    truncate = float(kwargs.get('truncate', 2))
+    shared = []
+    for image in images:
+        ndim = image.ndim - (2 if kwargs.get('batched', False) else 1)
+        sigmas = [float(s) for s in _conform_to_ndim(sigma, ndim, 'sigma')]
+        dtype = image.dtype if image.is_floating_point() else torch.float32
+        dtype = _resolve_compute_dtype(kwargs.get('compute_dtype'), image) or dtype
+        kernels = _blur_kernels(sigmas, truncate, image.device, dtype)
+        if _use_dense_kernel(image, kernels, kwargs.get('fft')):
+            kernels = [*kernels, _cached_dense_weight(tuple(kernels))]
+        shared.append(kernels)
+
+    results = []
+    used = set()
+    for i, image in enumerate(images):
+        current = torch.cuda.current_stream(image.device)
+        streams = _cuda_stream_pool(image.device)
+        stream = streams[i % len(streams)]
+
+        # make sure the input and kernels are ready before the side stream reads them
+        stream.wait_stream(current)
+        with torch.cuda.stream(stream):
+            blurred = gaussian_blur(image, sigma, **kwargs)
+
+        # let the caching allocator know the tensors cross stream boundaries, so that
+        # cached kernels evicted later are not reused while the side stream reads them
+        image.record_stream(stream)
+        for kernel in shared[i]:
+            kernel.record_stream(stream)
+        blurred.record_stream(current)
+        used.add((stream, current))
+        results.append(blurred)
+
+    for stream, current in used:
+        current.wait_stream(stream)
+
+    return results
+
+
+# number of side streams used to overlap independent blurs on each device
+_cuda_stream_count = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _cuda_stream_pool(device: torch.device) -> list:
+    """
+    A fixed pool of side streams for a CUDA device.
+    """
+    return [torch.cuda.Stream(device=device) for _ in range(_cuda_stream_count)]
+
+
+def _conform_to_ndim(value: float | list | torch.Tensor, ndim: int, name: str) -> list:
+    """
+    Conform a scalar or sequence parameter to a plain list of length `ndim`.
+    """
+    if torch.is_tensor(value) or getattr(value, 'ndim', None) == 0:
+        value = value.tolist()
+    if isinstance(value, numbers.Number):
+        return [value] * ndim
+    value = list(value)
+    if len(value) != ndim:
+        raise ValueError(f'{name} must be {ndim}D, but got length {len(value)}')
+    return value
+
+
+# kernel length above which the frequency-domain convolution is used by default
+_fft_kernel_threshold = 64
+
+
+@vx.compilation.optional_compile(dynamic=True)
+def _apply_kernels(
+    blurred: torch.Tensor,
+    kernels: list,
+    stride: list | None,
+    padding: str,
+    fft: bool | None = None) -> torch.Tensor:
+    """
+    Convolve a batched data grid with a sequence of 1D kernels, one for each
+    spatial dimension. Each kernel is applied as a 1D convolution along its
+    axis, so the cost per voxel scales with the sum (not the product) of the
+    kernel lengths. Kernels are built by the caller, so this routine can be compiled
+    into a single fused graph when `VOXEL_COMPILE` is enabled.
+
+    Kernels are expected to be pre-shaped as $(1, 1, K, 1)$ convolution weights
+    so that no per-call reshaping is required.
+    """
+    if padding not in ('same', 'valid'):
+        raise ValueError(f"padding must be 'same' or 'valid', but got '{padding}'")
+
+    # kernels always have odd length, so 'same' padding is just the kernel radius.
+    # resolving it here avoids the string-based padding dispatch of the convolution
+    steps = [1] * len(kernels) if stride is None else stride
+    pads = [(k.shape[2] - 1) // 2 if padding == 'same' else 0 for k in kernels]
+
+    # on the GPU, a small kernel footprint is cheaper to apply in a single dense
+    # pass that reads the volume once than in a sequence of per-axis passes
+    if _use_dense_kernel(blurred, kernels, fft):
+        return _dense_convolve(blurred, kernels, steps, pads)
+
+    # same-size passes ping-pong between two scratch buffers instead of allocating
+    # a new output volume for every axis. `owned` marks whether the current grid is
+    # such a buffer (and not the caller's input), so it can be reused once consumed
+    spare = None
+    owned = False
+
+    for dim, (kernel, step, pad) in enumerate(zip(kernels, steps, pads)):
+        was_owned, owned = owned, False
 
-        # reuse previous kernel if we can
-        if dim == 0 or s != sigma[dim - 1]:
-            kernel = gaussian_kernel_1d(s, truncate, blurred.device, blurred.dtype)
-        
         # kernels are normalized. if the length is one, there's no point in using it.
         # but we still need to apply the stride if it's greater than 1
-        if len(kernel) == 1:
-            if stride is not None and stride[dim] != 1:
-                slicing = [slice(None)] * (ndim + 2)
-                slicing[dim + 2] = slice(None, None, stride[dim])
-                blurred = blurred[slicing]
+        if kernel.shape[2] == 1:
+            blurred = _stride_axis(blurred, dim + 2, step)
             continue
 
-        # set the stride for the current dimension
-        if stride is not None:
-            stride_dim = [1 if d != dim else stride[dim] for d in range(ndim)]
-        else:
-            stride_dim = 1
+        if fft or (fft is None and kernel.shape[2] > _fft_kernel_threshold):
+            blurred = _fft_convolve_axis(blurred, kernel, dim + 2, step, pad)
+            continue
 
-        # select the kernel for the current dimension
-        slices = [None] * (ndim + 2)
-        slices[dim + 2] = slice(None)
-        kernel_dim = kernel[slices]
+        # short kernels on the CPU are faster to apply directly as a handful of
+        # shifted multiply-adds than through the generic convolution machinery
+        if not blurred.is_cuda and step == 1 and kernel.shape[2] <= 2 * _direct_max_radius + 1:
+            out = None
+            if spare is not None and spare.shape == blurred.shape and not blurred.requires_grad:
+                out, spare = spare, None
+            convolved = _direct_convolve_axis(blurred, kernel, dim + 2, pad, out)
+            if was_owned:
+                spare = blurred
+            owned = convolved.shape == blurred.shape
+            blurred = convolved
+            continue
 
-        # apply the convolution
-        conv = getattr(torch.nn.functional, f'conv{ndim}d')
-        blurred = conv(blurred, kernel_dim, groups=image.shape[0], stride=stride_dim, padding=padding)
+        # view the grid as (outer, 1, length, inner) so that the target axis can be
+        # convolved in its existing memory layout with a (k, 1) kernel. unlike moving
+        # the axis to the end, this requires no transposed copy of the data
+        shape = blurred.shape
+        outer = shape[:dim + 2].numel()
+        inner = shape[dim + 3:].numel()
+        convolved = torch.nn.functional.conv2d(blurred.reshape(outer, 1, shape[dim + 2], inner),
+                                               kernel,
+                                               stride=(step, 1),
+                                               padding=(pad, 0))
+        blurred = convolved.view(*shape[:dim + 2], convolved.shape[2], *shape[dim + 3:])
 
-    if not batched:
-        blurred = blurred.squeeze(0)
+    return blurred
+
+
+# maximum number of elements in an N-D kernel footprint to apply in a single dense pass
+_dense_footprint_threshold = 125
+
+
+def _use_dense_kernel(blurred: torch.Tensor, kernels: list, fft: bool | None) -> bool:
+    """
+    Whether a set of separable kernels should be applied as a single dense N-D kernel.
+    """
+    if not blurred.is_cuda or fft or len(kernels) > 3:
+        return False
+    lengths = [k.shape[2] for k in kernels]
+    if fft is None and max(lengths) > _fft_kernel_threshold:
+        return False
+    footprint = torch.Size(lengths).numel()
+    return footprint > max(lengths) and footprint <= _dense_footprint_threshold
+
+
+def _dense_convolve(
+    blurred: torch.Tensor,
+    kernels: list,
+    steps: list,
+    pads: list) -> torch.Tensor:
+    """
+    Convolve a batched data grid with the outer product of a set of 1D kernels
+    in a single N-D convolution.
+    """
+    kernel = _cached_dense_weight(tuple(kernels))
+
+    # fold the batch and channel axes into the convolution batch dimension
+    shape = blurred.shape
+    conv = getattr(torch.nn.functional, f'conv{len(kernels)}d')
+    convolved = conv(blurred.reshape(-1, 1, *shape[2:]),
+                     kernel,
+                     stride=tuple(steps),
+                     padding=tuple(pads))
+    return convolved.view(*shape[:2], *convolved.shape[2:])
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_dense_weight(kernels: tuple) -> torch.Tensor:
+    """
+    Outer product of a set of cached 1D kernels, pre-shaped as a single-channel N-D
+    convolution weight. Since the 1D kernels are themselves cached, they are keyed
+    by identity, and equal sigmas along every axis map to the same entry.
+    """
+    kernel = kernels[0].view(-1)
+    for k in kernels[1:]:
+        kernel = kernel.unsqueeze(-1) * k.view(-1)
+    return kernel.view(1, 1, *kernel.shape).contiguous()
+
+
+# maximum kernel radius convolved by direct tap accumulation on the CPU
+_direct_max_radius = 3
+
+
+def _direct_convolve_axis(
+    x: torch.Tensor,
+    kernel: torch.Tensor,
+    dim: int,
+    pad: int,
+    out: torch.Tensor | None = None) -> torch.Tensor:
+    """
+    Convolve a tensor with a short symmetric 1D kernel along a single axis by
+    accumulating shifted, weighted copies of the input. If provided, the result
+    is written into `out`, which must match the input shape and not alias it.
+    """
+    weights = kernel.view(-1).tolist()
+    r = (len(weights) - 1) // 2
+
+    # initialize with the center tap and accumulate the remaining taps
+    convolved = torch.mul(x, weights[r], out=out)
+    weights[r] = 0
+    _accumulate_taps(x, weights, dim, convolved)
+
+    # without padding, only the fully-supported center region is kept
+    if pad != r:
+        convolved = convolved.narrow(dim, r - pad, x.shape[dim] - 2 * (r - pad))
+    return convolved
+
+
+def _accumulate_taps(x: torch.Tensor, weights: list, dim: int, out: torch.Tensor) -> torch.Tensor:
+    """
+    Accumulate the zero-padded, same-size correlation of a tensor with a list of
+    odd-length scalar weights along a single axis into an output tensor.
+    """
+    r = (len(weights) - 1) // 2
+    length = x.shape[dim]
+    for t, weight in enumerate(weights):
+        offset = t - r
+        size = length - abs(offset)
+        if weight == 0 or size <= 0:
+            continue
+        source = x.narrow(dim, max(0, offset), size)
+        out.narrow(dim, max(0, -offset), size).add_(source, alpha=weight)
+    return out
+
+
+def _stride_axis(x: torch.Tensor, dim: int, step: int) -> torch.Tensor:
+    """
+    Subsample a tensor along a single axis with a given step.
+    """
+    if step == 1:
+        return x
+    slicing = [slice(None)] * x.ndim
+    slicing[dim] = slice(None, None, step)
+    return x[tuple(slicing)]
+
+
+def _fft_convolve_axis(
+    x: torch.Tensor,
+    kernel: torch.Tensor,
+    dim: int,
+    step: int,
+    pad: int) -> torch.Tensor:
+    """
+    Convolve a tensor with a symmetric 1D kernel along a single axis by
+    multiplication in the frequency domain. The signal is implicitly zero-padded
+    to the full linear convolution length, so the result matches the spatial
+    convolution with `pad` elements of zero padding on each side.
+    """
+    kernel = kernel.view(-1)
+    length = x.shape[dim]
+    r = (len(kernel) - 1) // 2
+    n = length + 2 * r
+
+    # the real FFT does not support reduced precision types on all devices
+    dtype = x.dtype
+    if dtype in (torch.float16, torch.bfloat16):
+        x = x.float()
+        kernel = kernel.float()
+
+    shape = [1] * x.ndim
+    shape[dim] = -1
+    spectrum = torch.fft.rfft(x, n=n, dim=dim) * torch.fft.rfft(kernel, n=n).view(shape)
+    convolved = torch.fft.irfft(spectrum, n=n, dim=dim)
+
+    # crop the linear convolution to the requested output extent
+    convolved = convolved.narrow(dim, 2 * r - pad, length + 2 * (pad - r))
+    return _stride_axis(convolved, dim, step).to(dtype)
+
+
+class GaussianBlur(torch.nn.Module):
+    """
+    Gaussian blurring module with precomputed kernels.
+
+    The 1D kernels are built once at construction and registered as buffers, so
+    they follow the module across devices and no kernel construction is required
+    during the forward pass.
+    """
+
+    def __init__(self,
+        sigma: float | list,
+        ndim: int = 3,
+        truncate: float = 2,
+        batched: bool = True) -> None:
+        """
+        Args:
+            sigma (float | list): Standard deviations in element (voxel) space.
+            ndim (int, optional): Number of spatial dimensions. Ignored if a
+                sequence of sigmas is provided.
+            truncate (float, optional): The number of standard deviations to extend
+                the kernel before truncating.
+            batched (bool, optional): If True, assume inputs have a batch dimension.
+        """
+        super().__init__()
+        if not isinstance(sigma, numbers.Number) and getattr(sigma, 'ndim', None) != 0:
+            ndim = len(sigma)
+        sigma = [float(s) for s in _conform_to_ndim(sigma, ndim, 'sigma')]
+        self.ndim = ndim
+        self.batched = batched
+        for d, s in enumerate(sigma):
+            self.register_buffer(f'kernel_{d}', gaussian_kernel_1d(s, truncate).view(1, 1, -1, 1))
+        self._cast_kernels = {}
+
+    def _apply(self, fn, *args, **kwargs):
+        # the cast kernels are derived from the buffers, so they are rebuilt after the
+        # buffers are moved or converted
+        self._cast_kernels = {}
+        return super()._apply(fn, *args, **kwargs)
+
+    def _kernels(self, dtype: torch.dtype) -> list:
+        """
+        Kernel buffers cast to a data type. The cast kernels are kept so that every
+        forward pass uses the same tensors, which keeps the identity-keyed dense
+        kernel cache effective for half or double precision inputs.
+        """
+        kernels = self._cast_kernels.get(dtype)
+        if kernels is None:
+            kernels = [getattr(self, f'kernel_{d}').to(dtype) for d in range(self.ndim)]
+            self._cast_kernels[dtype] = kernels
+        return kernels
+
+    def forward(self, image: torch.Tensor) -> torch.Tensor:
+        """
+        Args:
+            image (Tensor): An image tensor with preceding channel dimensions (and
+                a batch dimension if the module is batched).
+
+        Returns:
+            Tensor: The blurred tensor with the same shape as the input tensor.
+        """
+        blurred = image if image.is_floating_point() else image.float()
+        if not self.batched:
+            blurred = blurred.unsqueeze(0)
+
+        kernels = self._kernels(blurred.dtype)
+        blurred = _apply_kernels(blurred, kernels, None, 'same')
+
+        if not self.batched:
+            blurred = blurred.squeeze(0)
+
+        return blurred
+
+
+# number of fractional bits used to quantize kernel weights for fixed-point blurring
+_fixed_point_bits = 15
+
+
+def gaussian_blur_uint8(
+    image: torch.Tensor,
+    sigma: list,
+    batched: bool = False,
+    truncate: float = 2) -> torch.Tensor:
+    """
+    Apply Gaussian blurring to a uint8 data grid using fixed-point arithmetic.
+
+    Kernel weights are quantized to 15-bit fixed point and accumulated in 32-bit
+    integers, so the image is never promoted to floating point. Results are rounded
+    back to uint8 after each axis, and zero padding is used at the borders.
+
+    Args:
+        image (Tensor): A uint8 image tensor with preceding channel dimensions. A
+            batch dimension can be included by setting `batched=True`.
+        sigma (float): Standard deviations in element (voxel) space.
+        batched (bool, optional): If True, assume image has a batch dimension.
+        truncate (float, optional): The number of standard deviations to extend
+            the kernel before truncating.
+
+    Returns:
+        Tensor: The blurred uint8 tensor with the same shape as the input tensor.
+    """
+    if image.dtype != torch.uint8:
+        raise ValueError(f'expected a uint8 image, but got {image.dtype}')
+
+    ndim = image.ndim - (2 if batched else 1)
+
+    # sanity check for common mistake
+    if ndim == 4 and not batched:
+        raise ValueError(f'gaussian blur input has {image.ndim} dims, '
+                          'but batched option is False')
+
+    sigma = [float(s) for s in _conform_to_ndim(sigma, ndim, 'sigma')]
+    scale = 1 << _fixed_point_bits
+
+    blurred = image
+    for dim, s in enumerate(sigma):
+
+        kernel = _cached_kernel(s, float(truncate), torch.device('cpu'), torch.float64)
+        if len(kernel) == 1:
+            continue
+        weights = (kernel * scale).round().int().tolist()
+
+        # accumulate each kernel tap as a weighted, shifted copy of the input. the
+        # uint8 input is promoted to int32 within the in-place addition itself
+        axis = blurred.ndim - ndim + dim
+        accumulated = torch.zeros(blurred.shape, dtype=torch.int32, device=blurred.device)
+        _accumulate_taps(blurred, weights, axis, accumulated)
+
+        # round back down to the uint8 range
+        accumulated += scale // 2
+        blurred = (accumulated >> _fixed_point_bits).clamp_(0, 255).to(torch.uint8)
 
     return blurred
 
@@ -144,17 +689,23 @@ def dilate(image: torch.Tensor, iterations: int = 1, batched: bool = False) -> t
     if not batched:
         dilated = dilated.unsqueeze(0)
 
+    # fold the batch and channel axes into a single depthwise channel axis
+    shape = dilated.shape
+    dilated = dilated.reshape(1, -1, *shape[2:])
+    groups = dilated.shape[1]
+
     kernel = torch.zeros([3] * ndim, device=dilated.device, dtype=dilated.dtype)
     for dim in range(ndim):
         slices = [slice(None)] * ndim
         slices[dim] = 1
         kernel[tuple(slices)] = 1
-    kernel = kernel.view(1, 1, *kernel.shape)
+    kernel = kernel.expand(groups, 1, *kernel.shape).contiguous()
 
     conv = getattr(torch.nn.functional, f'conv{ndim}d')
     for _ in range(iterations):
-        dilated = conv(dilated, kernel, groups=image.shape[0], padding='same')
+        dilated = conv(dilated, kernel, groups=groups, padding=1)
 
+    dilated = dilated.view(shape)
     if not batched:
         dilated = dilated.squeeze(0)
 
@@ -0,0 +1,97 @@
+"""
+Numba-compiled CPU kernels for filtering small data grids. This module requires
+the optional numba package and is only imported on demand.
+"""
+
+import numba
+import numpy as np
+
+
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def convolve_axis(image: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """
+    Convolve a grid, viewed as $(outer, length, inner)$, with an odd-length 1D
+    kernel along its middle axis using zero 'same' padding.
+    """
+    outer, length, inner = image.shape
+    r = (kernel.shape[0] - 1) // 2
+    convolved = np.zeros_like(image)
+    for o in numba.prange(outer):
+        for i in range(length):
+            lo = max(0, r - i)
+            hi = min(kernel.shape[0], length + r - i)
+            for t in range(lo, hi):
+                weight = kernel[t]
+                source = i + t - r
+                # contiguous innermost loop, which numba can vectorize
+                for j in range(inner):
+                    convolved[o, i, j] += weight * image[o, source, j]
+    return convolved
+
+
+def blur(image: np.ndarray, kernels: list) -> np.ndarray:
+    """
+    Blur a batched grid of shape $(B, C, *spatial)$ with one 1D kernel per
+    spatial axis.
+    """
+    shape = image.shape
+    blurred = np.ascontiguousarray(image)
+    for dim, kernel in enumerate(kernels):
+        if kernel.shape[0] == 1:
+            continue
+        axis = dim + 2
+        outer = int(np.prod(shape[:axis]))
+        inner = int(np.prod(shape[axis + 1:]))
+        blurred = convolve_axis(blurred.reshape(outer, shape[axis], inner), kernel)
+    return blurred.reshape(shape)
+
+
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def resample_affine(
+    image: np.ndarray,
+    matrix: np.ndarray,
+    shape: tuple,
+    linear: bool) -> np.ndarray:
+    """
+    Resample a $(C, W, H, D)$ grid with zero padding, where `matrix` maps target
+    voxel coordinates of the output `shape` to source voxel coordinates.
+    """
+    channels, W, H, D = image.shape
+    resampled = np.zeros((channels, shape[0], shape[1], shape[2]), dtype=image.dtype)
+    for i in numba.prange(shape[0]):
+        for j in range(shape[1]):
+            for k in range(shape[2]):
+
+                # compute the source coordinate inline from the affine matrix
+                x = matrix[0, 0] * i + matrix[0, 1] * j + matrix[0, 2] * k + matrix[0, 3]
+                y = matrix[1, 0] * i + matrix[1, 1] * j + matrix[1, 2] * k + matrix[1, 3]
+                z = matrix[2, 0] * i + matrix[2, 1] * j + matrix[2, 2] * k + matrix[2, 3]
+
+                if not linear:
+                    xi, yi, zi = int(round(x)), int(round(y)), int(round(z))
+                    if 0 <= xi < W and 0 <= yi < H and 0 <= zi < D:
+                        for c in range(channels):
+                            resampled[c, i, j, k] = image[c, xi, yi, zi]
+                    continue
+
+                # blend the (up to) eight in-bounds neighbors of the coordinate
+                x0, y0, z0 = int(np.floor(x)), int(np.floor(y)), int(np.floor(z))
+                dx, dy, dz = x - x0, y - y0, z - z0
+                for a in range(2):
+                    xa = x0 + a
+                    if xa < 0 or xa >= W:
+                        continue
+                    wx = dx if a else 1 - dx
+                    for b in range(2):
+                        yb = y0 + b
+                        if yb < 0 or yb >= H:
+                            continue
+                        wy = wx * (dy if b else 1 - dy)
+                        for g in range(2):
+                            zg = z0 + g
+                            if zg < 0 or zg >= D:
+                                continue
+                            weight = wy * (dz if g else 1 - dz)
+                            for c in range(channels):
+                                resampled[c, i, j, k] += weight * image[c, xa, yb, zg]
+    return resampled
@@ -82,35 +82,33 @@ def slicing_to_coordinates(slicing: tuple, shape: tuple) -> tuple:
     Returns:
         tuple of Tensor: Minimum coordinates, maximum coordinates, and strides.
     """
-    shape = torch.tensor(shape, dtype=torch.int)
+    shape = [int(d) for d in shape]
 
     # make sure slicing is conformed to the right size
     slicing = expand_slicing(slicing, len(shape))
 
-    # extract the minimum coordinate based on the slice start index
-    minc = torch.zeros(len(shape), dtype=torch.int)
-    for i, s in enumerate(slicing):
-        if isinstance(s, slice) and s.start is not None:
-            minc[i] = s.start
+    # the coordinates are computed with plain python integers and converted to
+    # tensors once, since per-element tensor indexing is far slower for so few values
+    minc = []
+    maxc = []
+    for s, size in zip(slicing, shape):
+
+        # extract the minimum coordinate based on the slice start index and the maximum
+        # coordinate based on the slice stop index (subtracted by 1)
+        if isinstance(s, slice):
+            start = 0 if s.start is None else int(s.start)
+            stop = size - 1 if s.stop is None else int(s.stop) - 1
         elif isinstance(s, (int, torch.Tensor)):
-            minc[i] = s
-
-    # wrap any negative coordinates
-    negative = minc < 0
-    minc[negative] = shape[negative] + minc[negative]
-
-    # extract the minimum coordinate based on the slice
-    # stop index (subtracted by 1)
-    maxc = shape - 1
-    for i, s in enumerate(slicing):
-        if isinstance(s, slice) and s.stop is not None:
-            maxc[i] = s.stop - 1
-        elif isinstance(s, (int, torch.Tensor)):
-            maxc[i] = s
+            start = stop = int(s)
+        else:
+            start, stop = 0, size - 1
+
+        # wrap any negative coordinates
+        minc.append(size + start if start < 0 else start)
+        maxc.append(size + stop if stop < 0 else stop)
 
-    # again, wrap any negative coordinates
-    negative = maxc < 0
-    maxc[negative] = shape[negative] + maxc[negative]
+    minc = torch.tensor(minc, dtype=torch.int)
+    maxc = torch.tensor(maxc, dtype=torch.int)
 
     # extract stride (if exists) from the slice step
     stride = [s.step if isinstance(s, slice) else None for s in slicing]
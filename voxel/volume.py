@@ -4,11 +4,19 @@ Methods related to a volumetric image grid with a world-space geometry.
 
 from __future__ import annotations
 
+import functools
 import os
 import torch
 import voxel as vx
 
 
+# default data type of newly constructed volumes (see `set_default_storage_dtype`)
+_default_storage_dtype = None
+
+# number of elements above which `Volume.isin` uses a sorted binary search
+_isin_search_threshold = 32
+
+
 class Volume:
     """
     A multi-channel volumetric (3D) image with a world-space representation.
@@ -18,6 +26,32 @@ class Volume:
     of the image (called the **baseshape**).
     """
 
+    __slots__ = ('_tensor', '_geometry', '_resample_scratch')
+
+    # if enabled, linear resampling on the GPU is computed in half precision, which
+    # halves the memory traffic of the (bandwidth-bound) sampling at the cost of
+    # sampling positions that are only accurate to about 1e-3 of the grid extent
+    enable_mixed_precision_resample = False
+
+    # if enabled, the normalized sampling grids of the few most recent resampling calls
+    # are cached by shape and transform, which helps pipelines that resample many volumes
+    # between the same pair of geometries. each cached grid stores three floats per target
+    # voxel on the device, and building the cache key requires a host sync of the matrix
+    cache_resample_grids = False
+
+    # if enabled, linear and nearest resampling with zero padding is computed with a
+    # sparse interpolation operator that is cached on the target geometry. building the
+    # operator costs about as much as a single resampling, but each subsequent volume
+    # resampled between the same pair of geometries only requires a sparse product.
+    # the operator stores up to eight weights and indices per target voxel
+    use_sparse_cache = False
+
+    # if enabled, volumes that are not stored as float keep the float copy of their
+    # features required by grid sampling, and reuse it when resampled again (e.g. during
+    # repeated augmentation). this trades a persistent float copy of the volume for
+    # avoiding a full-size allocation on every resampling call
+    reuse_resample_buffers = False
+
     def __init__(self,
         tensor: torch.Tensor,
         geometry: vx.AcquisitionGeometry | vx.AffineMatrix | None = None) -> None:
@@ -114,6 +148,54 @@ class Volume:
         geometry = self.geometry if geometry is None else geometry
         return self.__class__(tensor, geometry)
 
+    @classmethod
+    def _new_unchecked(cls, tensor: torch.Tensor, geometry: vx.AcquisitionGeometry) -> Volume:
+        """
+        Construct a volume without validating the tensor dimensionality or the
+        geometry. The caller must guarantee a $(C, W, H, D)$ tensor with a base
+        shape that matches the geometry.
+        """
+        volume = cls.__new__(cls)
+        volume._tensor = tensor
+        volume._geometry = geometry
+        return volume
+
+    def _sampling_features(self, mode: str) -> torch.Tensor:
+        """
+        Float features for grid sampling. If `reuse_resample_buffers` is enabled, the
+        conversion is written into a scratch buffer kept on the volume, which is only
+        allocated on the first call. The buffer is overwritten by subsequent calls.
+        Features that are sampled in half precision are returned unconverted, since
+        `_grid_sample` casts them directly.
+        """
+        tensor = self._tensor
+        if _use_half_sampling(tensor, mode):
+            return tensor
+        if tensor.dtype == torch.float32 or tensor.requires_grad or not self.reuse_resample_buffers:
+            return tensor.float()
+        scratch = getattr(self, '_resample_scratch', None)
+        if scratch is None or scratch.shape != tensor.shape or scratch.device != tensor.device:
+            scratch = torch.empty(tensor.shape, dtype=torch.float32, device=tensor.device)
+            self._resample_scratch = scratch
+        return scratch.copy_(tensor, non_blocking=True)
+
+    def _new_elementwise(self, tensor: torch.Tensor) -> Volume:
+        """
+        Wrap the result of an elementwise operation on the volume tensor. The
+        validation in `new()` is skipped unless broadcasting changed the base shape.
+        """
+        if tensor.ndim == 4 and tensor.shape[1:] == self._tensor.shape[1:]:
+            return self._new_unchecked(tensor, self._geometry)
+        return self.new(tensor)
+
+    @staticmethod
+    def clear_resample_cache() -> None:
+        """
+        Release the sampling grids cached by `resample_like` and `transform` when
+        `cache_resample_grids` is enabled.
+        """
+        _cached_sampling_grid.cache_clear()
+
     def save(self, filename: os.PathLike, fmt: str = None) -> None:
         """
         Save the volume to a file.
@@ -148,21 +230,46 @@ class Volume:
         Returns:
             Volume: A new volume instance with the detached tensor.
         """
-        return self.new(self.tensor.detach())
+        return self._new_unchecked(self.tensor.detach(), self._geometry)
 
-    def to(self, device: torch.Device) -> Volume:
+    def to(self,
+        device: torch.Device | None = None,
+        dtype: torch.dtype | None = None,
+        non_blocking: bool = False) -> Volume:
         """
-        Move the volume tensor to a device.
+        Move the volume tensor to a device and/or convert it to a data type. Both
+        conversions are done by a single copy, which is cheaper than chaining calls
+        like `vol.cuda().float()`.
 
         Args:
-            device (Device): The target device.
+            device (Device, optional): The target device.
+            dtype (torch.dtype, optional): The target data type.
+            non_blocking (bool, optional): If True, copies from pinned memory (see
+                `pin_memory`) to the GPU are asynchronous with respect to the host.
+                The copy is ordered on the current stream, so no synchronization is
+                needed before GPU operations, but a GPU-to-host copy must be
+                synchronized before the result is read on the host.
 
         Returns:
             Volume: A new volume instance with the tensor on the target device.
         """
-        if device is None:
+        tensor = self.tensor.to(device=device, dtype=dtype, non_blocking=non_blocking)
+        if tensor is self.tensor:
             return self
-        return self.new(self.tensor.to(device))
+        return self._new_unchecked(tensor, self._geometry)
+
+    def pin_memory(self) -> Volume:
+        """
+        Copy the volume tensor into page-locked (pinned) host memory, which enables
+        faster and asynchronous (`non_blocking`) transfers to the GPU. This is best
+        done once, for example in a data loader worker, rather than before every copy.
+
+        Returns:
+            Volume: A new volume instance with a pinned tensor.
+        """
+        if self.tensor.is_pinned():
+            return self
+        return self._new_unchecked(self.tensor.pin_memory(), self._geometry)
 
     def cuda(self) -> Volume:
         """
@@ -171,7 +278,7 @@ class Volume:
         Returns:
             Volume: A new volume instance with the tensor on the GPU.
         """
-        return self.new(self.tensor.cuda())
+        return self._new_unchecked(self.tensor.cuda(), self._geometry)
 
     def cpu(self) -> Volume:
         """
@@ -180,7 +287,23 @@ class Volume:
         Returns:
             Volume: A new volume instance with the tensor on the CPU.
         """
-        return self.new(self.tensor.cpu())
+        return self._new_unchecked(self.tensor.cpu(), self._geometry)
+
+    def to_channels_last_3d(self) -> Volume:
+        """
+        Store the volume tensor with channels as the fastest-varying (innermost)
+        dimension. The shape is unchanged, but batched views of the tensor are in
+        `torch.channels_last_3d` format, which avoids layout conversions in cuDNN
+        convolutions and enables tensor-core kernels on recent GPUs. The layout
+        is preserved by device and datatype conversions.
+
+        Returns:
+            Volume: A new volume instance with a channels-last tensor.
+        """
+        batched = self.tensor.unsqueeze(0)
+        if batched.is_contiguous(memory_format=torch.channels_last_3d):
+            return self
+        return self.new(batched.contiguous(memory_format=torch.channels_last_3d).squeeze(0))
 
     def type(self, dtype: torch.dtype) -> Volume:
         """
@@ -194,7 +317,7 @@ class Volume:
         """
         if self.tensor.dtype == dtype:
             return self
-        return self.new(self.tensor.type(dtype))
+        return self._new_unchecked(self.tensor.type(dtype), self._geometry)
 
     def float(self) -> Volume:
         """
@@ -203,7 +326,7 @@ class Volume:
         Returns:
             Volume: A new float volume instance.
         """
-        return self.new(self.tensor.float())
+        return self.type(torch.float32)
 
     def half(self) -> Volume:
         """
@@ -212,7 +335,18 @@ class Volume:
         Returns:
             Volume: A new half-precision float volume instance.
         """
-        return self.new(self.tensor.half())
+        return self.type(torch.float16)
+
+    def bfloat16(self) -> Volume:
+        """
+        Convert the volume tensor to bfloat16 data type. This halves the memory
+        footprint and bandwidth of float32 storage while keeping its dynamic range.
+        Sums and means of reduced-precision volumes are accumulated in float32.
+
+        Returns:
+            Volume: A new bfloat16 volume instance.
+        """
+        return self.type(torch.bfloat16)
 
     def int(self) -> Volume:
         """
@@ -221,7 +355,7 @@ class Volume:
         Returns:
             Volume: A new integer volume instance.
         """
-        return self.new(self.tensor.int())
+        return self.type(torch.int32)
 
     def bool(self) -> Volume:
         """
@@ -230,7 +364,7 @@ class Volume:
         Returns:
             Volume: A new boolean volume instance.
         """
-        return self.new(self.tensor.bool())
+        return self.type(torch.bool)
 
     def max(self, dim: int | None = None) -> Volume | torch.Tensor:
         """
@@ -277,7 +411,7 @@ class Volume:
         Returns:
             Tensor or Volume: The summed value(s) or volume.
         """
-        reduced = self.tensor.sum(dim=dim)
+        reduced = self.tensor.sum(dim=dim, dtype=_accumulation_dtype(self.dtype))
         return self.new(reduced) if dim == 0 else reduced
 
     def mean(self, dim: int | None = None) -> Volume | torch.Tensor:
@@ -293,7 +427,7 @@ class Volume:
         Returns:
             Tensor or Volume: The mean value(s) or volume.
         """
-        reduced = self.tensor.mean(dim=dim)
+        reduced = self.tensor.mean(dim=dim, dtype=_accumulation_dtype(self.dtype))
         return self.new(reduced) if dim == 0 else reduced
 
     def floor(self) -> Volume:
@@ -303,7 +437,7 @@ class Volume:
         Returns:
             Volume: A new floored volume instance.
         """
-        return self.new(self.tensor.floor())
+        return self._new_unchecked(self._tensor.floor(), self._geometry)
 
     def ceil(self) -> Volume:
         """
@@ -312,7 +446,7 @@ class Volume:
         Returns:
             Volume: A new ceiled volume instance.
         """
-        return self.new(self.tensor.ceil())
+        return self._new_unchecked(self._tensor.ceil(), self._geometry)
 
     def abs(self) -> Volume:
         """
@@ -321,7 +455,7 @@ class Volume:
         Returns:
             Volume: A new volume instance.
         """
-        return self.new(self.tensor.abs())
+        return self._new_unchecked(self._tensor.abs(), self._geometry)
 
     def exp(self) -> Volume:
         """
@@ -330,7 +464,7 @@ class Volume:
         Returns:
             Volume: A new exponentiated volume instance.
         """
-        return self.new(self.tensor.exp())
+        return self._new_unchecked(self._tensor.exp(), self._geometry)
 
     def log(self) -> Volume:
         """
@@ -339,7 +473,7 @@ class Volume:
         Returns:
             Volume: A new log-transformed volume instance.
         """
-        return self.new(self.tensor.log())
+        return self._new_unchecked(self._tensor.log(), self._geometry)
 
     def sqrt(self) -> Volume:
         """
@@ -348,7 +482,7 @@ class Volume:
         Returns:
             Volume: A new square-rooted volume instance.
         """
-        return self.new(self.tensor.sqrt())
+        return self._new_unchecked(self._tensor.sqrt(), self._geometry)
 
     def square(self) -> Volume:
         """
@@ -357,7 +491,7 @@ class Volume:
         Returns:
             Volume: A new squared volume instance.
         """
-        return self.new(self.tensor.square())
+        return self._new_unchecked(self._tensor.square(), self._geometry)
 
     def pow(self, exponent: float) -> Volume:
         """
@@ -369,7 +503,7 @@ class Volume:
         Returns:
             Volume: A new powered volume instance.
         """
-        return self.new(self.tensor.pow(exponent))
+        return self._new_unchecked(self._tensor.pow(exponent), self._geometry)
 
     def isnan(self) -> Volume:
         """
@@ -378,7 +512,7 @@ class Volume:
         Returns:
             Volume: A new volume mask instance.
         """
-        return self.new(self.tensor.isnan())
+        return self._new_unchecked(self.tensor.isnan(), self._geometry)
 
     def clamp(self,
         min: float = None,
@@ -396,9 +530,31 @@ class Volume:
             Volume: A new (if not in-place) clamped volume instance.
         """
         if inplace:
-            return self.new(self.tensor.clamp_(min=min, max=max))
+            return self._new_unchecked(self.tensor.clamp_(min=min, max=max), self._geometry)
         else:
-            return self.new(self.tensor.clamp(min=min, max=max))
+            return self._new_unchecked(self.tensor.clamp(min=min, max=max), self._geometry)
+
+    def affine_normalize(self,
+        scale: float,
+        bias: float,
+        min: float | None = None,
+        max: float | None = None) -> Volume:
+        """
+        Scale and shift the volume features, then clamp the result, as in
+        `(volume * scale + bias).clamp(min, max)`. When compilation is enabled
+        (see `voxel.compilation`), the chain is fused into a single elementwise
+        kernel instead of materializing each intermediate volume.
+
+        Args:
+            scale (float): Multiplicative factor.
+            bias (float): Additive offset, applied after scaling.
+            min (float, optional): Minimum value to clamp to.
+            max (float, optional): Maximum value to clamp to.
+
+        Returns:
+            Volume: A new normalized volume instance.
+        """
+        return self._new_elementwise(_affine_normalize(self.tensor, scale, bias, min, max))
 
     def maximum(self, other: Volume) -> Volume:
         """
@@ -410,7 +566,7 @@ class Volume:
         Returns:
             Volume: A maximized volume instance.
         """
-        return self.new(self.tensor.maximum(other.tensor))
+        return self._new_elementwise(self.tensor.maximum(other.tensor))
 
     def minimum(self, other: Volume) -> Volume:
         """
@@ -422,7 +578,7 @@ class Volume:
         Returns:
             Volume: A minimized volume instance.
         """
-        return self.new(self.tensor.minimum(other.tensor))
+        return self._new_elementwise(self.tensor.minimum(other.tensor))
 
     def all(self, dim: int | None = None) -> Volume | torch.Tensor:
         """
@@ -566,9 +722,35 @@ class Volume:
             Volume: A boolean volume that is True when a voxel value is
                 in `elements` and False otherwise.
         """
-        if isinstance(elements, (list, tuple)):
-            elements = torch.tensor(elements, device=self.device)
-        return self.new(torch.isin(self.tensor, elements))
+        elements = torch.as_tensor(elements, device=self.device)
+
+        # for larger sets (e.g. label lookups in a segmentation), a binary search
+        # of each voxel in the sorted unique elements is faster than the default
+        if elements.numel() <= _isin_search_threshold or self.dtype == torch.bool:
+            return self._new_unchecked(torch.isin(self.tensor, elements), self._geometry)
+        dtype = torch.promote_types(self.dtype, elements.dtype)
+        values = self.tensor.to(dtype)
+        candidates = elements.reshape(-1).to(dtype).unique()
+        index = torch.bucketize(values, candidates).clamp_(max=candidates.numel() - 1)
+        return self._new_unchecked(candidates[index] == values, self._geometry)
+
+    def onehot(self, labels: torch.Tensor | list) -> Volume:
+        """
+        Compute a one-hot encoding of a single-channel label volume, in which each
+        output channel is a mask of the voxels matching a label. This is a single
+        broadcasted comparison, rather than a separate comparison per label.
+
+        Args:
+            labels (Tensor or list): The $L$ label values to encode.
+
+        Returns:
+            Volume: A boolean volume with $L$ channels.
+        """
+        if self.num_channels != 1:
+            raise ValueError(f'one-hot encoding requires a single-channel volume, '
+                             f'got {self.num_channels} channels')
+        labels = torch.as_tensor(labels, device=self.device)
+        return self._new_unchecked(self.tensor == labels.view(-1, 1, 1, 1), self._geometry)
 
     def unique(self, **kwargs) -> torch.Tensor:
         """
@@ -599,13 +781,15 @@ class Volume:
             return self.tensor.min()
         if q == 1:
             return self.tensor.max()
-        flattened = self.tensor.flatten()
+        # a single selection of the k-th smallest element is much cheaper than a
+        # (partial) sort of the k smallest or largest elements
+        flattened = self.tensor.reshape(-1)
+        n = flattened.numel()
         if q > 0.5:
-            k = int(flattened.numel() * (1.0 - q)) + 1
-            return flattened.topk(k, largest=True, sorted=False).values.min()
+            k = n - int(n * (1.0 - q))
         else:
-            k = int(flattened.numel() * q) + 1
-            return flattened.topk(k, largest=False, sorted=False).values.max()
+            k = int(n * q) + 1
+        return flattened.kthvalue(k).values
 
     # -------------------------------------------------------------------------
     # indexing / operator overloads for tensor-style voxel data manipulation
@@ -637,73 +821,82 @@ class Volume:
         return self.crop(indexing)
 
     def __setitem__(self, indexing, value) -> None:
+        # assigning a scalar through a boolean mask volume or to the entire volume can be
+        # done with a single in-place fill, without computing indices for a scatter
+        if isinstance(value, (int, float, bool)):
+            if isinstance(indexing, Volume) and indexing.dtype == torch.bool:
+                self._tensor.masked_fill_(indexing.tensor.expand_as(self._tensor), value)
+                return
+            if indexing is Ellipsis or (isinstance(indexing, slice) and indexing == slice(None)):
+                self._tensor.fill_(value)
+                return
         self.tensor[_cast_volume_as_tensor(indexing)] = _cast_volume_as_tensor(value)
 
     # comparison operators
 
     def __eq__(self, other) -> Volume:
-        return self.new(self.tensor == _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor == _cast_volume_as_tensor(other))
     
     def __ne__(self, other) -> Volume:
-        return self.new(self.tensor != _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor != _cast_volume_as_tensor(other))
 
     def __lt__(self, other) -> Volume:
-        return self.new(self.tensor < _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor < _cast_volume_as_tensor(other))
 
     def __le__(self, other) -> Volume:
-        return self.new(self.tensor <= _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor <= _cast_volume_as_tensor(other))
 
     def __gt__(self, other) -> Volume:
-        return self.new(self.tensor > _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor > _cast_volume_as_tensor(other))
 
     def __ge__(self, other) -> Volume:
-        return self.new(self.tensor >= _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor >= _cast_volume_as_tensor(other))
 
     # unary operators
 
     def __pos__(self) -> Volume:
-        return self.new(+self.tensor)
+        return self._new_unchecked(+self._tensor, self._geometry)
 
     def __neg__(self) -> Volume:
-        return self.new(-self.tensor)
+        return self._new_unchecked(-self._tensor, self._geometry)
 
     # binary operators
 
     def __and__(self, other) -> Volume:
-        return self.new(self.tensor & _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor & _cast_volume_as_tensor(other))
 
     def __or__(self, other) -> Volume:
-        return self.new(self.tensor | _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor | _cast_volume_as_tensor(other))
 
     def __xor__(self, other) -> Volume:
-        return self.new(self.tensor ^ _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor ^ _cast_volume_as_tensor(other))
 
     def __add__(self, other) -> Volume:
-        return self.new(self.tensor + _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor + _cast_volume_as_tensor(other))
 
     def __radd__(self, other) -> Volume:
-        return self.new(_cast_volume_as_tensor(other) + self.tensor)
+        return self._new_elementwise(_cast_volume_as_tensor(other) + self.tensor)
 
     def __sub__(self, other) -> Volume:
-        return self.new(self.tensor - _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor - _cast_volume_as_tensor(other))
 
     def __rsub__(self, other) -> Volume:
-        return self.new(_cast_volume_as_tensor(other) - self.tensor)
+        return self._new_elementwise(_cast_volume_as_tensor(other) - self.tensor)
 
     def __mul__(self, other) -> Volume:
-        return self.new(self.tensor * _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor * _cast_volume_as_tensor(other))
 
     def __rmul__(self, other) -> Volume:
-        return self.new(_cast_volume_as_tensor(other) * self.tensor)
+        return self._new_elementwise(_cast_volume_as_tensor(other) * self.tensor)
 
     def __truediv__(self, other) -> Volume:
-        return self.new(self.tensor / _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor / _cast_volume_as_tensor(other))
 
     def __rtruediv__(self, other) -> Volume:
-        return self.new(_cast_volume_as_tensor(other) / self.tensor)
+        return self._new_elementwise(_cast_volume_as_tensor(other) / self.tensor)
 
     def __pow__(self, other) -> Volume:
-        return self.new(self.tensor ** _cast_volume_as_tensor(other))
+        return self._new_elementwise(self.tensor ** _cast_volume_as_tensor(other))
 
     # assignment operators
 
@@ -806,26 +999,26 @@ class Volume:
         """
         if nonzero:
             # compute the bounding box around all nonzero voxels
-            tensor = self.tensor if self.num_channels > 1 else self.tensor.sum(0)
-            nonzero = tensor.view(self.baseshape).nonzero()
-            if nonzero.shape[0] == 0:
-                raise ValueError('cannot compute nonzero bounds on an empty volume')
-            min_point = nonzero.amin(dim=0).float()
-            max_point = nonzero.amax(dim=0).float()
+            min_point, max_point = _nonzero_extent(self.tensor)
+            min_point = min_point.float()
+            max_point = max_point.float()
         else:
-            # just use the bounds of the volume extent
-            min_point = torch.zeros(3, device=self.device)
-            max_point = torch.tensor(self.baseshape, device=self.device).float() - 1
+            # just use the bounds of the volume extent. these few coordinates are
+            # built and transformed on the host, and the final mesh is moved to the
+            # volume device with a single copy
+            min_point = torch.zeros(3)
+            max_point = _shape_tensor(self.baseshape).float() - 1
         
         # expand (or shrink) margin around border
         if margin is not None:
-            margin = self.geometry.conform_units(margin, space, 'world', 2)
-            min_point -= margin[:, 0]
-            max_point += margin[:, 1]
+            # the box corners are voxel coordinates, so the margin must be in voxel units
+            margin = self.geometry.conform_units(margin, space, 'voxel', 2).to(min_point.device)
+            min_point = min_point - margin[:, 0]
+            max_point = max_point + margin[:, 1]
 
         # build the world-space bounding box mesh
         mesh = vx.mesh.construct_box_mesh(min_point, max_point)
-        return mesh.transform(self.geometry)
+        return mesh.transform(self.geometry).to(self.device)
 
     def centroids(self, space: vx.Space) -> torch.Tensor:
         """
@@ -838,15 +1031,7 @@ class Volume:
         Returns:
             Tensor: Per-channel coordinates of shape (C, 3).
         """
-        clamped_tensor = self.tensor.clamp(min=0).float()
-
-        # compute the centroids with a differentiable coordinate weighting
-        coord = lambda a: (a * torch.arange(a.shape[-1], device=self.device)).sum(-1) / (a.sum(-1) + 1e-6)
-        z_mean = clamped_tensor.mean(-1)
-        x = coord(z_mean.mean(-1))
-        y = coord(z_mean.mean(-2))
-        z = coord(clamped_tensor.mean(-2).mean(-2))
-        centroids = torch.stack([x, y, z], dim=-1)
+        centroids = _weighted_centroids(self.tensor)
 
         # transform to world-space if necessary
         if vx.Space(space) == 'world':
@@ -878,17 +1063,19 @@ class Volume:
             # any set of mesh points could work here
             world2voxel = self.geometry.inverse()
             points = world2voxel.transform(cropping.vertices.detach())
-            minc = points.amin(0).cpu().ceil().int()
-            maxc = points.amax(0).cpu().floor().int()
+            coords = torch.stack((points.amin(0).ceil(), points.amax(0).floor())).int()
 
             # extend the boundary
             if margin is not None:
-                minc -= margin
-                maxc += margin
+                coords += torch.stack((-margin, margin)).to(coords.device)
+
+            # the coordinates are only needed on the host to build the slicing,
+            # so transfer both bounds together in a single synchronization
+            minc, maxc = coords.cpu().unbind()
 
             # make sure the coordinates are clamped within the volume extent
             minc = minc.clamp(min=0)
-            maxc = maxc.clamp(max=torch.tensor(self.baseshape))
+            maxc = maxc.clamp(max=_shape_tensor(self.baseshape))
             stride = None
 
             # convert coordinate bounds to a 4D slicing tuple
@@ -911,7 +1098,7 @@ class Volume:
             minc, maxc, stride = vx.slicing.slicing_to_coordinates(cropping[1:], self.baseshape)
             if margin is not None:
                 minc = (minc - margin).clamp(min=0)
-                maxc = (maxc + margin).clamp(max=torch.tensor(self.baseshape))
+                maxc = (maxc + margin).clamp(max=_shape_tensor(self.baseshape))
                 slicing = (slicing[0], *vx.slicing.coordinates_to_slicing(minc, maxc, stride))
         else:
             raise ValueError(f'unknown cropping item: {type(cropping)}')
@@ -942,12 +1129,11 @@ class Volume:
         Returns:
             Volume: The cropped volume instance.
         """
-        nonzero = self.tensor.nonzero()
-        # note: we're using nonzero() directly here instead of calling self.bounds() to avoid
-        # the unnecessary transformation into world space then back again)
-        minc = nonzero.amin(0)
-        maxc = nonzero.amax(0)
-        return self.crop(vx.slicing.coordinates_to_slicing(minc, maxc), margin=margin)
+        # note: we're computing the extent directly here instead of calling self.bounds() to
+        # avoid the unnecessary transformation into world space then back again
+        minc, maxc = _nonzero_extent(self.tensor)
+        slicing = (slice(None), *vx.slicing.coordinates_to_slicing(minc, maxc))
+        return self.crop(slicing, margin=margin)
 
     def reorient(self, orientation: vx.Orientation) -> Volume:
         """
@@ -979,7 +1165,8 @@ class Volume:
         target: Volume | vx.AcquisitionGeometry,
         mode: str = 'linear',
         padding_mode: str = 'zeros',
-        antialias: bool = False) -> Volume:
+        antialias: bool = False,
+        backend: str = 'torch') -> Volume:
         """
         Resample the volume features to match the geometry of a target volume.
 
@@ -989,13 +1176,27 @@ class Volume:
             padding_mode (str, optional): Padding mode for outside grid values.
             antialias (bool, optional): If True, will apply a Gaussian filter
                 before resampling to avoid aliasing artifacts.
+            backend (str, optional): Sampling backend, either 'torch' or 'numba'. The
+                numba backend computes each sample directly from the affine transform
+                without a coordinate grid, and requires the numba package. It is only
+                used for linear sampling of CPU volumes with zero padding that do not
+                require gradients, since nearest sampling gathers voxels directly.
 
         Returns:
             Volume: Resampled volume instance.
         """
+        if backend not in ('torch', 'numba'):
+            raise ValueError(f"backend must be 'torch' or 'numba', but got '{backend}'")
+
         if isinstance(target, Volume):
             target = target.geometry
 
+        # volumes that share a geometry (or its matrix) are already on the same grid,
+        # which can be determined without comparing any matrix values
+        if target is self.geometry or \
+           (target.tensor is self.geometry.tensor and target.baseshape == self.baseshape):
+            return self._new_unchecked(self.tensor, target)
+
         # check if the matrices are similar because we might be able to avoid any
         # actual resampling if that's the case. first, we check the rotation and scale
         if torch.allclose(self.geometry.tensor[:, :3], target.tensor[:, :3], atol=1e-4, rtol=0):
@@ -1009,36 +1210,31 @@ class Volume:
             # otherwise, it's possible the difference between image spaces is only a voxel-shift,
             # in which case we can just crop and/or pad -- much faster than resampling.
             # we need to check if the voxel-space translations are all integers
-            delta = (self.geometry.inverse() @ target).transform(torch.zeros(3))
+            # the voxel shift is just the translation of the (host-side) source-to-target matrix
+            delta = self.geometry.voxel_transform(target)[:3, -1]
             delta_rounded = delta.round()
             if torch.allclose(delta, delta_rounded, atol=1e-4, rtol=0):
 
                 # these are the relative shifts in voxels at the lower (origin) and upper corners
-                lower = delta_rounded.int().cpu()
-                upper = lower + torch.tensor(target.baseshape) - torch.tensor(self.baseshape)
-
-                # apply any necessary cropping to the tensor
-                minc = lower.clamp(min=0)
-                maxc = upper.clamp(max=0) + torch.tensor(self.baseshape)
-                slicing = (slice(None), *[slice(a, b) for a, b in zip(minc, maxc)])
-                resampled = self.tensor[slicing]
-
-                # apply any necessary padding to the tensor
-                a = lower.clamp(max=0).abs()
-                b = upper.clamp(min=0)
-                padding = torch.stack((b, a), dim=1).flatten()
-                if (padding != 0).any():
-                    mode = dict(zeros='constant', reflection='reflect', border='replicate').get(padding_mode)
-                    if mode is None:
-                        raise ValueError(f'no padding mode equivolent for {padding_mode}')
-                    reverse = list(reversed([int(d) for d in padding]))
-                    resampled = torch.nn.functional.pad(resampled, reverse, mode=mode)
-
+                lower = [int(d) for d in delta_rounded.tolist()]
+                upper = [l + t - s for l, t, s in zip(lower, target.baseshape, self.baseshape)]
+                resampled = _crop_or_pad(self.tensor, lower, upper, padding_mode)
                 return self.new(resampled, target)
     
+        # if enabled, apply the cached sparse resampling operator between the two geometries
+        if self.use_sparse_cache and not antialias and padding_mode == 'zeros' and \
+           mode in ('linear', 'nearest') and not target.tensor.requires_grad and \
+           not self.geometry.tensor.requires_grad:
+            operator = target.sampling_matrix(self.geometry, mode, device=self.device)
+            resampled = (operator @ self.tensor.flatten(1).float().T).T
+            resampled = resampled.reshape(-1, *target.baseshape)
+            if mode == 'nearest':
+                resampled = resampled.type(self.dtype)
+            return self.new(resampled, target)
+
         # if we got here, it means have to resort to doing a grid interpolation, so first
         # build the coordinate grid for the target image
-        transform = self.geometry.inverse() @ target
+        transform = self.geometry.voxel_transform(target)
 
         if antialias:
             # if antialiasing is enabled, we'll need to do some extra work. the goal is to smooth
@@ -1068,15 +1264,19 @@ class Volume:
         else:
             intermediate_baseshape = target.baseshape
 
-        grid = volume_grid(intermediate_baseshape, transform=transform,
-                           device=self.device, localshape=self.baseshape)
-
-        resampled = torch.nn.functional.grid_sample(
-                        input=self.tensor.float().unsqueeze(0),
-                        grid=grid.unsqueeze(0),
-                        mode=('bilinear' if mode == 'linear' else mode),
-                        padding_mode=padding_mode,
-                        align_corners=True).squeeze(0)
+        if mode == 'nearest' and padding_mode in ('zeros', 'border'):
+            # nearest sampling picks a single source voxel, so the voxels are gathered
+            # directly in the original data type without a float copy of the volume
+            resampled = _nearest_sample(self.tensor, transform, intermediate_baseshape, padding_mode)
+        elif backend == 'numba' and _use_numba_resample(self.tensor, mode, padding_mode):
+            resampled = _numba_resample(self.tensor, transform, intermediate_baseshape, mode)
+        elif vx.compilation.compile_enabled():
+            resampled = _compiled_warp(self._sampling_features(mode), transform.tensor.to(self.device),
+                                       tuple(intermediate_baseshape), tuple(self.baseshape),
+                                       mode, padding_mode)
+        else:
+            grid = _sampling_grid(intermediate_baseshape, transform, self.baseshape, self.device)
+            resampled = _grid_sample(self._sampling_features(mode), grid, mode, padding_mode)
 
         if antialias:
             resampled = vx.filters.gaussian_blur(resampled, sigma, stride=tuple(down_factor),
@@ -1094,7 +1294,8 @@ class Volume:
         slice_spacing: float | torch.Tensor = None,
         mode: str = 'linear',
         padding_mode: str = 'zeros',
-        antialias: bool = False) -> Volume:
+        antialias: bool = False,
+        backend: str = 'torch') -> Volume:
         """
         Resample voxel features to a new voxel grid spacing.
 
@@ -1109,13 +1310,32 @@ class Volume:
             padding_mode (str, optional): Padding mode for outside grid values.
             antialias (bool, optional): If True, will apply a Gaussian filter
                 before resampling to avoid aliasing artifacts.
+            backend (str, optional): Sampling backend, either 'torch' or 'numba'. See
+                `resample_like`.
 
         Returns:
             Volume: Volume resampled to the target voxel spacing.
         """
         target = self.geometry.resample(spacing=spacing, in_plane_spacing=in_plane_spacing,
                                         slice_spacing=slice_spacing)
-        return self.resample_like(target, mode=mode, padding_mode=padding_mode, antialias=antialias)
+
+        # a target spacing that matches the current spacing leaves the volume unchanged
+        source_spacing = self.geometry.spacing
+        tolerance = 1e-5 * source_spacing.min()
+        if target.baseshape == self.baseshape and \
+           (target.spacing - source_spacing).abs().max() < tolerance:
+            return self.new(self.tensor, self.geometry)
+
+        # downsampling by integer factors that evenly divide the grid samples voxels (or
+        # pairs of voxels) at fixed strides, which doesn't require any grid interpolation
+        if not antialias and mode in ('linear', 'nearest'):
+            transform = self.geometry.voxel_transform(target)
+            resampled = _strided_downsample(self.tensor, transform, target.baseshape, mode)
+            if resampled is not None:
+                return self.new(resampled, target)
+
+        return self.resample_like(target, mode=mode, padding_mode=padding_mode,
+                                  antialias=antialias, backend=backend)
 
     def reshape(self, baseshape: torch.Size) -> Volume:
         """
@@ -1131,7 +1351,12 @@ class Volume:
         returns:
             Volume: Reshaped volume instance.
         """
-        return self.resample_like(self.geometry.reshape(baseshape), mode='nearest')
+        # reshaping is always an integer voxel shift, so crop and pad directly
+        baseshape = [int(b) for b in baseshape]
+        target = self.geometry.reshape(baseshape)
+        lower = [(s - b) // 2 for s, b in zip(self.baseshape, baseshape)]
+        upper = [l + b - s for l, b, s in zip(lower, baseshape, self.baseshape)]
+        return self.new(_crop_or_pad(self.tensor, lower, upper), target)
 
     def pad(self, delta: float | torch.Tensor, space: vx.Space) -> Volume:
         """
@@ -1148,7 +1373,12 @@ class Volume:
         returns:
             Volume: Reshaped volume instance.
         """
-        return self.resample_like(self.geometry.pad(delta, space), mode='nearest')
+        # padding is always an integer voxel shift, so crop and pad directly
+        margin = self.geometry.conform_units(delta, space, 'voxel', 2).round().int()
+        target = self.geometry.pad(margin, 'voxel')
+        lower = (-margin[:, 0]).tolist()
+        upper = margin[:, 1].tolist()
+        return self.new(_crop_or_pad(self.tensor, lower, upper), target)
 
     def trim(self, delta: float | torch.Tensor, space: vx.Space) -> Volume:
         """
@@ -1171,7 +1401,8 @@ class Volume:
         transform: vx.AffineVolumeTransform | vx.AffineMatrix,
         resample: bool = False,
         negate: bool = False,
-        mode: str = 'linear') -> Volume:
+        mode: str = 'linear',
+        backend: str = 'torch') -> Volume:
         """
         Apply a spatial transform to the volume. By default, this method will not
         resample the image data and instead transform the world geometry.
@@ -1185,6 +1416,8 @@ class Volume:
                 geometry so that image features do not move in world space. This option
                 can only be enabled when resampling is enabled.
             mode (str, optional): Interpolation mode if resampling.
+            backend (str, optional): Sampling backend if resampling, either 'torch'
+                or 'numba'. See `resample_like`.
 
         Returns:
             Volume: Transformed volume.
@@ -1205,16 +1438,25 @@ class Volume:
         target = transform.target
         inverted = transform.convert(space='voxel', source=self).inverse()
 
-        # construct the transformed resampling grid
-        grid = volume_grid(target.baseshape, transform=inverted,
-                           device=self.device, localshape=self.baseshape)
-
-        interpolated = torch.nn.functional.grid_sample(
-                        self.tensor.unsqueeze(0).float(),
-                        grid.unsqueeze(0),
-                        mode=('bilinear' if mode == 'linear' else mode),
-                        padding_mode='zeros',
-                        align_corners=True).squeeze(0)
+        # an identity voxel transform between grids of the same shape leaves the features
+        # unchanged, so there's nothing to interpolate
+        matrix = inverted.tensor
+        identity = not matrix.requires_grad and target.baseshape == self.baseshape and \
+            torch.allclose(matrix, torch.eye(4, dtype=matrix.dtype, device=matrix.device),
+                           atol=1e-6, rtol=0)
+
+        if identity:
+            interpolated = self.tensor.float()
+        elif backend == 'numba' and _use_numba_resample(self.tensor, mode, 'zeros'):
+            interpolated = _numba_resample(self.tensor, inverted, target.baseshape, mode)
+        elif vx.compilation.compile_enabled():
+            interpolated = _compiled_warp(self._sampling_features(mode), inverted.tensor.to(self.device),
+                                          tuple(target.baseshape), tuple(self.baseshape),
+                                          mode, 'zeros')
+        else:
+            # construct the transformed resampling grid
+            grid = _sampling_grid(target.baseshape, inverted, self.baseshape, self.device)
+            interpolated = _grid_sample(self._sampling_features(mode), grid, mode, 'zeros')
 
         if negate:
             # apply inverse transform to the geometry to cancel out world space changes
@@ -1293,7 +1535,10 @@ class Volume:
     # image filtering and statistical normalization
     # -------------------------------------------------------------------------
 
-    def smooth(self, sigma: float | torch.Tensor, truncate: float = 2) -> Volume:
+    def smooth(self,
+        sigma: float | torch.Tensor,
+        truncate: float = 2,
+        compute_dtype: torch.dtype | str | None = None) -> Volume:
         """
         Apply Gaussian smoothing to the image features.
 
@@ -1301,12 +1546,17 @@ class Volume:
             sigma (float | Tensor): Smoothing sigma in world space units.
             truncate (float, optional): The number of standard deviations to extend
             the kernel before truncating.
+            compute_dtype (torch.dtype | str, optional): Datatype in which to run the
+                separable convolution. See `vx.filters.gaussian_blur`.
 
         Returns:
             Volume: Smoothed volume.
         """
-        scaled = torch.as_tensor(sigma, device=self.device) / self.geometry.spacing.to(self.device)
-        return self.new(vx.filters.gaussian_blur(self.tensor, scaled, truncate=truncate))
+        # the voxel sigmas only parameterize the kernels, so compute them on the host
+        scaled = torch.as_tensor(sigma, dtype=torch.float32).cpu() / self.geometry.spacing.cpu()
+        blurred = vx.filters.gaussian_blur(self.tensor, scaled.tolist(), truncate=truncate,
+                                           compute_dtype=compute_dtype)
+        return self._new_unchecked(blurred, self._geometry)
 
     def dilate(self, iterations: int = 1) -> Volume:
         """
@@ -1325,9 +1575,139 @@ def _cast_volume_as_tensor(other: object) -> object:
     """
     If provided a Volume, cast to a Tensor, otherwise return the input.
     """
+    # exact type checks are much cheaper than isinstance for the common operands
+    # of elementwise operators, which are tensors, scalars, and plain volumes
+    cls = type(other)
+    if cls is Volume:
+        return other._tensor
+    if cls in _non_volume_operand_types:
+        return other
     return other.tensor if isinstance(other, Volume) else other
 
 
+# operand types that can skip the volume subclass check in `_cast_volume_as_tensor`
+_non_volume_operand_types = frozenset((torch.Tensor, int, float, bool))
+
+
+def set_default_storage_dtype(dtype: torch.dtype | None) -> None:
+    """
+    Set the default data type of volumes created by the `zeros_like`, `ones_like`,
+    `full_like`, `rand_like`, and `randn_like` constructors. For example, setting
+    `torch.bfloat16` halves the memory traffic of elementwise operations on new
+    volumes.
+
+    Args:
+        dtype (torch.dtype | None): The default storage type, which must be a
+            floating point type. If None, the torch default data type is used.
+    """
+    if dtype is not None and (not isinstance(dtype, torch.dtype) or not dtype.is_floating_point):
+        raise ValueError(f'default storage type must be a floating point dtype, but got {dtype}')
+    global _default_storage_dtype
+    _default_storage_dtype = dtype
+
+
+def get_default_storage_dtype() -> torch.dtype | None:
+    """
+    Get the default data type of newly constructed volumes.
+
+    Returns:
+        torch.dtype | None: The default storage type, or None if the torch
+            default data type is used.
+    """
+    return _default_storage_dtype
+
+
+def _accumulation_dtype(dtype: torch.dtype) -> torch.dtype | None:
+    """
+    Data type in which to accumulate reductions, where None indicates the
+    input type. Reduced-precision floats are accumulated in float32.
+    """
+    return torch.float32 if dtype in (torch.float16, torch.bfloat16) else None
+
+
+def _nonzero_extent(tensor: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+    """
+    Compute the spatial extent of the nonzero voxels (across all channels) of a
+    $(C, W, H, D)$ tensor. Instead of materializing the indices of every nonzero
+    voxel, the occupancy mask is reduced to a boolean vector along each axis.
+
+    Returns:
+        tuple of Tensor: Minimum and maximum (inclusive) voxel coordinates.
+    """
+    mask = tensor.any(dim=0)
+    if not mask.any():
+        raise ValueError('cannot compute nonzero bounds on an empty volume')
+
+    minc, maxc = [], []
+    for dim in range(3):
+        # reduce the other two axes, starting with the last so the indices stay valid
+        occupied = mask
+        for other in reversed([d for d in range(3) if d != dim]):
+            occupied = occupied.any(dim=other)
+        occupied = occupied.int()
+        minc.append(occupied.argmax())
+        maxc.append(occupied.shape[0] - 1 - occupied.flip(0).argmax())
+    return torch.stack(minc), torch.stack(maxc)
+
+
+@vx.compilation.optional_compile(dynamic=True)
+def _affine_normalize(
+    tensor: torch.Tensor,
+    scale: float,
+    bias: float,
+    min: float | None,
+    max: float | None) -> torch.Tensor:
+    """
+    Compute `(tensor * scale + bias).clamp(min, max)`, skipping the clamp if
+    no bounds are given.
+    """
+    normalized = tensor * scale + bias
+    if min is None and max is None:
+        return normalized
+    return normalized.clamp(min=min, max=max)
+
+
+@vx.compilation.optional_compile(dynamic=True)
+def _weighted_centroids(tensor: torch.Tensor) -> torch.Tensor:
+    """
+    Compute the per-channel voxel centroids of a $(C, W, H, D)$ tensor, with
+    negative values clamped to zero.
+    """
+    clamped_tensor = tensor.clamp(min=0).float()
+    C, W, H, D = clamped_tensor.shape
+
+    # only two passes over the full volume are needed: the depth-summed projection
+    # yields the width and height marginals, and a second sum yields the depth marginal
+    wh = clamped_tensor.sum(-1)
+    total = wh.sum((-2, -1))
+    marginals = (wh.sum(-1), wh.sum(-2), clamped_tensor.sum((1, 2)))
+
+    # compute the centroids with a differentiable coordinate weighting. the epsilon is
+    # scaled by the number of voxels in each marginal to match the per-axis mean weighting
+    coords = []
+    for marginal, count in zip(marginals, (H * D, W * D, W * H)):
+        weighted = marginal @ _axis_coordinates(marginal.shape[-1], marginal.device)
+        coords.append(weighted / (total + 1e-6 * count))
+    return torch.stack(coords, dim=-1)
+
+
+@functools.lru_cache(maxsize=64)
+def _shape_tensor(shape: torch.Size, device: torch.device | None = None) -> torch.Tensor:
+    """
+    Cached integer tensor of a spatial shape. The returned tensor is shared
+    across calls and must not be modified in-place.
+    """
+    return torch.tensor(shape, device=device)
+
+
+@functools.lru_cache(maxsize=32)
+def _axis_coordinates(length: int, device: torch.device) -> torch.Tensor:
+    """
+    Cached voxel coordinates along an axis of a given length.
+    """
+    return torch.arange(length, dtype=torch.float32, device=device)
+
+
 def volume_grid(
     baseshape: torch.Size,
     transform: vx.AffineMatrix | None = None,
@@ -1348,16 +1728,338 @@ def volume_grid(
     Returns:
         Tensor: Grid volume tensor.
     """
-    ranges = [torch.arange(s, dtype=torch.float32, device=device) for s in baseshape]
-    grid = torch.stack(torch.meshgrid(*ranges, indexing='ij'), dim=-1)
-    if transform:
-        grid = transform.transform(grid)
+    # normalizing and flipping the coordinates for torch sampling are both linear, so
+    # they are folded into the transform matrix instead of applied as passes over the grid
+    matrix = None if transform is None else transform.tensor
     if localshape is not None:
-        div = torch.tensor(localshape).maximum(torch.tensor(2)).to(grid.device) - 1
-        grid = (grid / div * 2 - 1).flip(-1)
+        local = _local_matrix(tuple(int(s) for s in localshape))
+        matrix = local if matrix is None else local.to(matrix) @ matrix
+
+    # the grid is allocated once and each value is written directly into it
+    ranges = [torch.arange(s, dtype=torch.float32, device=device) for s in baseshape]
+    grid = torch.empty((*ranges[0].shape, *ranges[1].shape, *ranges[2].shape, 3),
+                       dtype=torch.float32, device=ranges[0].device)
+    if matrix is None:
+        grid[..., 0] = ranges[0].view(-1, 1, 1)
+        grid[..., 1] = ranges[1].view(1, -1, 1)
+        grid[..., 2] = ranges[2].view(1, 1, -1)
+        return grid
+
+    # since the transform is affine, each grid point is a sum of the matrix columns
+    # scaled by its voxel coordinates. scaling the columns by each 1D coordinate range
+    # and broadcasting the sum avoids transforming a dense grid of coordinates
+    # the small matrix is transferred in a single asynchronous copy. the copy is
+    # ordered on the current stream before the grid computation that consumes it
+    matrix = matrix.to(device=grid.device, dtype=torch.float32, non_blocking=True)
+    x = ranges[0].view(-1, 1, 1, 1) * matrix[:3, 0]
+    y = ranges[1].view(1, -1, 1, 1) * matrix[:3, 1]
+    z = ranges[2].view(1, 1, -1, 1) * matrix[:3, 2]
+    if matrix.requires_grad:
+        # out= variants do not support autograd
+        return x + y + z + matrix[:3, 3]
+    torch.add(x + y, z + matrix[:3, 3], out=grid)
     return grid
 
 
+@functools.lru_cache(maxsize=16)
+def _norm_factor(localshape: tuple, device: torch.device) -> torch.Tensor:
+    """
+    Cached factors that scale voxel coordinates of a grid with spatial shape `localshape`
+    to the range [0, 2], which are kept on the device to avoid a host transfer on each
+    call. The returned tensor is shared across calls and must not be modified in-place.
+    """
+    return torch.tensor([2 / (max(s, 2) - 1) for s in localshape], dtype=torch.float32, device=device)
+
+
+@functools.lru_cache(maxsize=16)
+def _local_matrix(localshape: tuple) -> torch.Tensor:
+    """
+    Cached matrix that maps voxel coordinates of a grid with spatial shape `localshape`
+    to flipped local coordinates in the range [-1, 1], as expected by `grid_sample`.
+    This is the single definition of the convention, which also backs
+    `AcquisitionGeometry.voxel_to_local`. The returned tensor is shared across calls
+    and must not be modified in-place.
+    """
+    # the output coordinate order is reversed, so axis i is scaled into row 2 - i
+    matrix = torch.eye(4)
+    matrix[:3, :3] = _norm_factor(localshape, torch.device('cpu')).diag().flip(0)
+    matrix[:3, 3] = -1
+    return matrix
+
+
+def _use_numba_resample(tensor: torch.Tensor, mode: str, padding_mode: str) -> bool:
+    """
+    Whether a volume tensor can be resampled with the numba backend. Nearest sampling
+    with the numba kernel is only used by `transform`, since `resample_like` gathers
+    nearest voxels directly.
+    """
+    return not tensor.is_cuda and not tensor.requires_grad \
+        and mode in ('linear', 'nearest') and padding_mode == 'zeros'
+
+
+def _numba_resample(
+    tensor: torch.Tensor,
+    transform: vx.AffineMatrix,
+    baseshape: torch.Size,
+    mode: str) -> torch.Tensor:
+    """
+    Resample a $(C, W, H, D)$ CPU tensor with the numba-compiled affine sampler,
+    where `transform` maps target voxel coordinates to source voxel coordinates.
+    The sampled features are returned as float.
+    """
+    try:
+        from voxel import numba_kernels
+    except ImportError as exc:
+        raise ImportError('the numba resampling backend requires that the '
+                          'numba package is installed') from exc
+    image = tensor.float().contiguous().numpy()
+    matrix = transform.tensor.detach().cpu().double().numpy()
+    shape = tuple(int(s) for s in baseshape)
+    return torch.from_numpy(numba_kernels.resample_affine(image, matrix, shape, mode == 'linear'))
+
+
+def _use_half_sampling(tensor: torch.Tensor, mode: str) -> bool:
+    """
+    Whether a volume tensor is grid sampled in half precision.
+    """
+    return Volume.enable_mixed_precision_resample and tensor.is_cuda and mode == 'linear'
+
+
+def _grid_sample(
+    tensor: torch.Tensor,
+    grid: torch.Tensor,
+    mode: str,
+    padding_mode: str) -> torch.Tensor:
+    """
+    Sample a $(C, W, H, D)$ tensor at the normalized coordinates of a $(W', H', D', 3)$
+    grid. The sampled features are always returned as float.
+    """
+    if _use_half_sampling(tensor, mode):
+        tensor = tensor.half()
+        grid = grid.half()
+    else:
+        tensor = tensor.float()
+    sampled = torch.nn.functional.grid_sample(tensor[None], grid[None],
+                                              mode=('bilinear' if mode == 'linear' else mode),
+                                              padding_mode=padding_mode,
+                                              align_corners=True)[0]
+    return sampled.float()
+
+
+def _strided_downsample(
+    tensor: torch.Tensor,
+    transform: vx.AffineMatrix,
+    baseshape: torch.Size,
+    mode: str) -> torch.Tensor | None:
+    """
+    Downsample a $(C, W, H, D)$ tensor with strided slicing when `transform`, which maps
+    grid voxel coordinates to voxel coordinates of the tensor, is an integer downsampling
+    of the form `x -> f * x + (f - 1) / 2` (as constructed by `geometry.resample`)
+    and the factors evenly divide the tensor shape. For odd factors, the sampled points
+    are exactly on voxel centers. For even factors, they lie midway between two voxels,
+    which linear sampling averages. Returns None if the transform does not qualify.
+    """
+    matrix = transform.tensor.detach().cpu()
+    factors = matrix.diagonal()[:3].round()
+    expected = torch.eye(4, dtype=matrix.dtype)
+    expected[:3, :3] *= factors
+    expected[:3, -1] = (factors - 1) / 2
+    if (factors < 1).any() or not torch.allclose(matrix, expected, atol=1e-4, rtol=0):
+        return None
+
+    factors = [int(f) for f in factors.tolist()]
+    if any(s % f for s, f in zip(tensor.shape[1:], factors)) or \
+       [s // f for s, f in zip(tensor.shape[1:], factors)] != list(baseshape):
+        return None
+
+    # nearest sampling at the midpoint between two voxels is ambiguous
+    if mode == 'nearest' and any(f % 2 == 0 for f in factors):
+        return None
+
+    if mode == 'linear':
+        tensor = tensor.float()
+    for dim, f in enumerate(factors, start=1):
+        if f == 1:
+            continue
+        head = (slice(None),) * dim
+        if f % 2 == 1:
+            tensor = tensor[(*head, slice((f - 1) // 2, None, f))]
+        else:
+            lower = tensor[(*head, slice(f // 2 - 1, None, f))]
+            upper = tensor[(*head, slice(f // 2, None, f))]
+            tensor = (lower + upper) / 2
+    return tensor.contiguous()
+
+
+def _nearest_sample(
+    tensor: torch.Tensor,
+    transform: vx.AffineMatrix,
+    baseshape: torch.Size,
+    padding_mode: str) -> torch.Tensor:
+    """
+    Sample a $(C, W, H, D)$ tensor at the nearest voxels of a grid of shape `baseshape`,
+    where `transform` maps grid voxel coordinates to voxel coordinates of the tensor.
+    Values are gathered in the original data type, and points outside the tensor are
+    either zero or clamped to the border, depending on `padding_mode`.
+    """
+    # rounded coordinates carry no gradient, so the transform is detached
+    device = tensor.device
+    matrix = transform.tensor.detach().to(device=device, dtype=torch.float32)
+    baseshape = tuple(int(s) for s in baseshape)
+    x, y, z = [_axis_coordinates(s, device).view(shape) for s, shape in
+               zip(baseshape, ((-1, 1, 1), (1, -1, 1), (1, 1, -1)))]
+
+    # the flat source index is accumulated one axis at a time, so that only a single
+    # coordinate per target voxel exists at any point, rather than a dense (N, 3) grid
+    sourceshape = tensor.shape[1:]
+    index_dtype = torch.int32 if sourceshape.numel() < 2 ** 31 else torch.int64
+    flat = torch.zeros(baseshape, dtype=index_dtype, device=device)
+    if padding_mode == 'zeros':
+        outside = torch.zeros(baseshape, dtype=torch.bool, device=device)
+    for axis, size in enumerate(sourceshape):
+        coord = (x * matrix[axis, 0] + y * matrix[axis, 1]) + (z * matrix[axis, 2] + matrix[axis, 3])
+        coord.round_()
+        if padding_mode == 'zeros':
+            outside.logical_or_(coord < 0).logical_or_(coord > size - 1)
+        flat.mul_(size).add_(coord.clamp_(0, size - 1).to(index_dtype))
+        del coord
+
+    sampled = tensor.flatten(1).index_select(1, flat.view(-1))
+    if padding_mode == 'zeros':
+        sampled.masked_fill_(outside.view(-1), 0)
+    return sampled.view(-1, *baseshape)
+
+
+@vx.compilation.optional_compile(dynamic=True)
+def _compiled_warp(
+    tensor: torch.Tensor,
+    matrix: torch.Tensor,
+    baseshape: tuple,
+    localshape: tuple,
+    mode: str,
+    padding_mode: str) -> torch.Tensor:
+    """
+    Sample a $(C, W, H, D)$ tensor on a grid of shape `baseshape`, where `matrix` maps
+    grid voxel coordinates to voxel coordinates of the tensor. Unlike `_sampling_grid`,
+    the grid is never cached, so that when compilation is enabled its construction,
+    normalization, and the sampling are traced and fused together.
+    """
+    matrix = matrix.to(torch.float32)
+    ranges = [torch.arange(s, dtype=torch.float32, device=tensor.device) for s in baseshape]
+    points = ranges[0].view(-1, 1, 1, 1) * matrix[:3, 0] + \
+             ranges[1].view(1, -1, 1, 1) * matrix[:3, 1] + \
+             ranges[2].view(1, 1, -1, 1) * matrix[:3, 2] + matrix[:3, 3]
+    grid = (points * _norm_factor(localshape, tensor.device) - 1).flip(-1)
+    return _grid_sample(tensor, grid, mode, padding_mode)
+
+
+def _crop_or_pad(
+    tensor: torch.Tensor,
+    lower: list,
+    upper: list,
+    padding_mode: str = 'zeros') -> torch.Tensor:
+    """
+    Shift the spatial extent of a $(C, W, H, D)$ tensor by integer voxel offsets
+    at its lower (origin) and upper corners. Positive offsets move the corner
+    inward (cropping) at the lower corner and outward (padding) at the upper corner.
+    """
+    shape = tensor.shape[1:]
+
+    # apply any necessary cropping to the tensor
+    slicing = [slice(max(l, 0), s + min(u, 0)) for l, u, s in zip(lower, upper, shape)]
+    cropped = tensor[(slice(None), *slicing)]
+
+    # apply any necessary padding to the tensor, built in the reversed
+    # (last dimension first) order expected by torch
+    padding = (max(-lower[2], 0), max(upper[2], 0),
+               max(-lower[1], 0), max(upper[1], 0),
+               max(-lower[0], 0), max(upper[0], 0))
+    if not any(padding):
+        return cropped
+
+    mode = dict(zeros='constant', reflection='reflect', border='replicate').get(padding_mode)
+    if mode is None:
+        raise ValueError(f'no padding mode equivolent for {padding_mode}')
+    return torch.nn.functional.pad(cropped, padding, mode=mode)
+
+
+def _sampling_grid(
+    baseshape: torch.Size,
+    transform: vx.AffineMatrix,
+    localshape: torch.Size,
+    device: torch.device) -> torch.Tensor:
+    """
+    Construct a normalized grid for sampling a volume of shape `localshape` with
+    `grid_sample`. If `Volume.cache_resample_grids` is enabled, grids are cached by
+    the value of the transform matrix and the shapes. Transforms that require gradients
+    are never cached.
+    """
+    if not Volume.cache_resample_grids or transform.tensor.requires_grad:
+        return volume_grid(baseshape, transform=transform, localshape=localshape, device=device)
+    matrix = tuple(transform.tensor.flatten().tolist())
+    return _cached_sampling_grid(tuple(baseshape), matrix, tuple(localshape), torch.device(device))
+
+
+# grids can be large, so only the most recently used few are kept
+@functools.lru_cache(maxsize=4)
+def _cached_sampling_grid(
+    baseshape: tuple,
+    matrix: tuple,
+    localshape: tuple,
+    device: torch.device) -> torch.Tensor:
+    """
+    Cached variant of `volume_grid` keyed by hashable parameters. The returned
+    tensor is shared across calls and must not be modified in-place.
+    """
+    transform = vx.AffineMatrix(torch.tensor(matrix, dtype=torch.float32).view(4, 4))
+    return volume_grid(baseshape, transform=transform, localshape=localshape, device=device)
+
+
+def resample_like_batch(
+    vols: list,
+    target: Volume | vx.AcquisitionGeometry,
+    **kwargs) -> list:
+    """
+    Resample a list of volumes to match the geometry of a target volume. Volumes
+    that share a source geometry are resampled together in a single pass, with one
+    sampling grid and one `grid_sample` call, rather than one per volume.
+
+    Args:
+        vols (list of Volume): Volumes to resample.
+        target (Volume | AcquisitionGeometry): Target acquisition geometry.
+        **kwargs: Additional arguments passed to `Volume.resample_like`.
+
+    Returns:
+        list of Volume: Resampled volumes, in the same order as the inputs.
+    """
+    vols = list(vols)
+    if len(vols) < 2:
+        return [v.resample_like(target, **kwargs) for v in vols]
+
+    # volumes on different grids cannot share a sampling grid, and volumes of different
+    # data types would not be resampled to the same output types as individual calls
+    geometry = vols[0].geometry
+    shared = lambda v: v.dtype == vols[0].dtype and (v.geometry is geometry or
+        (v.baseshape == geometry.baseshape and torch.equal(v.geometry.tensor, geometry.tensor)))
+    if not all(shared(v) for v in vols[1:]):
+        return [v.resample_like(target, **kwargs) for v in vols]
+
+    # when the target is the same grid or only a voxel shift away, each individual call
+    # is a zero-copy or a crop/pad, so concatenating first would only add another copy
+    target_geometry = target.geometry if isinstance(target, Volume) else target
+    if torch.allclose(geometry.tensor[:, :3], target_geometry.tensor[:, :3], atol=1e-4, rtol=0):
+        delta = geometry.voxel_transform(target_geometry)[:3, -1]
+        if torch.allclose(delta, delta.round(), atol=1e-4, rtol=0):
+            return [v.resample_like(target, **kwargs) for v in vols]
+
+    # sampling is independent across channels, so the volumes are concatenated along the
+    # channel axis, resampled as a single volume, and split again afterward
+    merged = vols[0].new(torch.cat([v.tensor for v in vols]))
+    resampled = merged.resample_like(target, **kwargs)
+    split = resampled.tensor.split([v.num_channels for v in vols])
+    return [resampled.new(t) for t in split]
+
+
 def stack(*vols):
     """
     Concatenates (stacks) multiple volumes channel-wise. Assumes
@@ -1373,7 +2075,25 @@ def stack(*vols):
         vols = vols[0]
     if len(vols) == 1:
         return vols[0]
-    return vols[0].new(torch.cat([v.tensor for v in vols], dim=0))
+
+    # copy each volume directly into its channels of a single output buffer, using the
+    # same data type promotion as `torch.cat`. like `torch.cat`, inputs are never
+    # implicitly moved across devices
+    first = vols[0].tensor
+    if any(v.baseshape != vols[0].baseshape for v in vols[1:]):
+        raise ValueError('cannot stack volumes with different base shapes')
+    devices = {v.device for v in vols}
+    if len(devices) > 1:
+        names = ', '.join(sorted(str(d) for d in devices))
+        raise ValueError(f'expected all volumes to be on the same device, but found {names}')
+    dtype = functools.reduce(torch.promote_types, (v.dtype for v in vols))
+    channels = sum(v.num_channels for v in vols)
+    stacked = torch.empty((channels, *first.shape[1:]), dtype=dtype, device=first.device)
+    offset = 0
+    for v in vols:
+        stacked[offset:offset + v.num_channels].copy_(v.tensor)
+        offset += v.num_channels
+    return vols[0].new(stacked)
 
 
 def volumes_equal(